@@ -2,27 +2,22 @@
 import csv
 import re
 
+_LINK_RE = re.compile(r'\[([^\]]+)\]\([^\)]+\)')
+
 def clean_line(line):
     line = line.strip()
-    cleaned_line = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', line)
-    return cleaned_line
+    # Most rows carry no markdown link; skip the regex scan for those
+    if '[' in line and '](' in line:
+        line = _LINK_RE.sub(r'\1', line)
+    return line
 
 def process_file():
-    with open('raw_competitors.txt', 'r') as f:
-        lines = f.readlines()
-        
-    header = lines[0].strip().split(',')
-    
-    output_rows = []
-    
-    for line in lines[1:]:
-        if not line.strip(): continue
-        cleaned = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', line.strip())
-        output_rows.append(cleaned)
+    with open('raw_competitors.txt', 'r') as fin, open('competitors.csv', 'w') as fout:
+        header = next(fin).strip()
+        fout.write(header + '\n')
 
-    with open('competitors.csv', 'w') as f:
-        f.write(','.join(header) + '\n')
-        for row in output_rows:
-            f.write(row + '\n')
+        for line in fin:
+            if not line.strip(): continue
+            fout.write(clean_line(line) + '\n')
 
 process_file()
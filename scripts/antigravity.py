@@ -3,8 +3,11 @@ Competitor Intelligence Analysis using Google Gemini API
 Replace your existing scripts/antigravity.py with this file
 """
 
+import asyncio
+import hashlib
 import os
 import json
+import time
 from datetime import datetime
 from typing import Optional
 import google.generativeai as genai
@@ -18,58 +21,120 @@ genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 # Use Gemini 1.5 Flash (fast and free tier friendly) or Pro for better quality
 MODEL_NAME = "gemini-2.0-flash" # Change to "gemini-1.5-pro" for better results
 
-ANALYSIS_PROMPT = """You are a competitive intelligence analyst for Abuzz, a 3D wayfinding solutions company. 
-
-Analyze the following news article about {competitor_name} ({competitor_website}).
-
-## Information to Extract
-1. **Event Type** (select one):
-   - New Project/Installation
-   - Investment/Funding Round
-   - Award/Recognition
-   - Product Launch
-   - Partnership/Acquisition
-   - Leadership Change
-   - Market Expansion
-   - Technical Innovation
-
-2. **Key Details**:
-   - Date of announcement (YYYY-MM-DD format, use today's date if not specified)
-   - Location/Region affected
-   - Financial figures (if mentioned)
-   - Client/Partner names
-   - Technology/product names
-
-3. **Strategic Significance** (1-5 scale):
-   - 1 = Minimal impact on Abuzz
-   - 3 = Moderate competitive threat
-   - 5 = Major threat requiring immediate attention
-   - Consider: Does this affect malls, hospitals, airports, shopping centers? Does it involve 3D navigation?
-
-## Article to Analyze:
+# Most of an article's signal is in its first half; longer input only adds prefill latency
+MAX_ARTICLE_CHARS = 4000
+
+# Structured output schema — Gemini returns bare JSON matching this, no fences to strip
+_NULLABLE_STRING = {"type": "string", "nullable": True}
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "competitor": {"type": "string"},
+        "event_type": {"type": "string"},
+        "date": {"type": "string"},
+        "title": {"type": "string"},
+        "summary": {"type": "string"},
+        "threat_level": {"type": "integer"},
+        "details": {
+            "type": "object",
+            "properties": {
+                "location": _NULLABLE_STRING,
+                "financial_value": _NULLABLE_STRING,
+                "partners": {"type": "array", "items": {"type": "string"}},
+                "products": {"type": "array", "items": {"type": "string"}},
+            },
+        },
+        "source_url": {"type": "string"},
+        "extracted_at": {"type": "string"},
+    },
+    "required": ["competitor", "event_type", "title", "summary", "threat_level"],
+}
+
+# Built lazily on first use and reused for every article in the run
+_MODEL = None
+_GEN_CFG = genai.types.GenerationConfig(
+    temperature=0.2,  # Lower temperature for more consistent JSON
+    max_output_tokens=512,  # Output schema is small
+    response_mime_type="application/json",
+    response_schema=SCHEMA,
+)
+
+
+# --- Analysis cache (file-based, keyed by model + article) ---
+CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache', 'antigravity')
+
+
+def _cache_key(competitor_name: str, article_text: str, source_url: str) -> str:
+    raw = f"{MODEL_NAME}|{competitor_name}|{article_text[:MAX_ARTICLE_CHARS]}|{source_url}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _cache_get(key: str) -> Optional[dict]:
+    path = os.path.join(CACHE_DIR, f"{key}.json")
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                return json.load(f).get('result')
+        except Exception:
+            pass
+    return None
+
+
+def _cache_set(key: str, result: dict) -> None:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, f"{key}.json")
+    try:
+        with open(path, 'w') as f:
+            json.dump({'cached_at': time.time(), 'result': result}, f)
+    except Exception:
+        pass
+
+
+def _get_model():
+    global _MODEL
+    if _MODEL is None:
+        _MODEL = genai.GenerativeModel(MODEL_NAME)
+    return _MODEL
+
+ANALYSIS_PROMPT = """You are a competitive intelligence analyst for Abuzz (3D wayfinding solutions).
+Analyze this article about {competitor_name} ({competitor_website}):
+
 {article_text}
 
-## Output Format
-Return ONLY a valid JSON object (no markdown, no explanation):
-{{
-  "competitor": "{competitor_name}",
-  "event_type": "string",
-  "date": "YYYY-MM-DD",
-  "title": "short descriptive title",
-  "summary": "2-3 sentence executive summary",
-  "threat_level": 1-5,
-  "details": {{
-    "location": "string or null",
-    "financial_value": "string or null",
-    "partners": ["array of strings"],
-    "products": ["array of strings"]
-  }},
-  "source_url": "{source_url}",
-  "extracted_at": "{timestamp}"
-}}
+event_type: one of New Project/Installation, Investment/Funding Round, Award/Recognition, Product Launch, Partnership/Acquisition, Leadership Change, Market Expansion, Technical Innovation.
+threat_level (1-5): 1 = minimal impact, 3 = moderate threat, 5 = major threat. Weigh malls, hospitals, airports and 3D navigation higher.
+date: announcement date as YYYY-MM-DD (today if not specified).
+
+Return this JSON:
+{{"competitor": "{competitor_name}", "event_type": "", "date": "YYYY-MM-DD", "title": "short title", "summary": "2-3 sentences", "threat_level": 1, "details": {{"location": null, "financial_value": null, "partners": [], "products": []}}, "source_url": "{source_url}", "extracted_at": "{timestamp}"}}
 """
 
 
+def _build_prompt(competitor_name: str, competitor_website: str, article_text: str, source_url: str) -> str:
+    return ANALYSIS_PROMPT.format(
+        competitor_name=competitor_name,
+        competitor_website=competitor_website,
+        article_text=article_text[:MAX_ARTICLE_CHARS],  # Truncate very long articles
+        source_url=source_url,
+        timestamp=datetime.utcnow().isoformat() + "Z"
+    )
+
+
+def _parse_response(response) -> Optional[dict]:
+    """Turn a Gemini response into a validated result dict (raises JSONDecodeError)"""
+    result = json.loads(response.text)
+    
+    # Validate required fields
+    required_fields = ["competitor", "event_type", "title", "summary", "threat_level"]
+    for field in required_fields:
+        if field not in result:
+            print(f"⚠️  Missing required field: {field}")
+            return None
+    
+    print(f"✅ Analyzed: {result['title']} (Threat Level: {result['threat_level']})")
+    return result
+
+
 def generate(
     competitor_name: str,
     competitor_website: str,
@@ -94,44 +159,55 @@ def generate(
         print("   Get your free API key at: https://aistudio.google.com/app/apikey")
         return _mock_response(competitor_name, source_url)
     
+    key = _cache_key(competitor_name, article_text, source_url)
+    cached = _cache_get(key)
+    if cached is not None:
+        print(f"✅ Cached: {cached['title']} (Threat Level: {cached['threat_level']})")
+        return cached
+    
+    response = None
     try:
-        model = genai.GenerativeModel(MODEL_NAME)
-        
-        prompt = ANALYSIS_PROMPT.format(
-            competitor_name=competitor_name,
-            competitor_website=competitor_website,
-            article_text=article_text[:8000],  # Truncate very long articles
-            source_url=source_url,
-            timestamp=datetime.utcnow().isoformat() + "Z"
-        )
-        
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.2,  # Lower temperature for more consistent JSON
-                max_output_tokens=1024,
-            )
-        )
-        
-        # Extract JSON from response
-        response_text = response.text.strip()
-        
-        # Handle markdown code blocks if present
-        if response_text.startswith("```"):
-            response_text = response_text.split("```")[1]
-            if response_text.startswith("json"):
-                response_text = response_text[4:]
-        
-        result = json.loads(response_text)
-        
-        # Validate required fields
-        required_fields = ["competitor", "event_type", "title", "summary", "threat_level"]
-        for field in required_fields:
-            if field not in result:
-                print(f"⚠️  Missing required field: {field}")
-                return None
+        prompt = _build_prompt(competitor_name, competitor_website, article_text, source_url)
+        response = _get_model().generate_content(prompt, generation_config=_GEN_CFG)
+        result = _parse_response(response)
+        if result is not None:
+            _cache_set(key, result)
+        return result
         
-        print(f"✅ Analyzed: {result['title']} (Threat Level: {result['threat_level']})")
+    except json.JSONDecodeError as e:
+        print(f"❌ Failed to parse JSON response: {e}")
+        print(f"   Raw response: {response.text[:200]}...")
+        return None
+    except Exception as e:
+        print(f"❌ Gemini API error: {e}")
+        return None
+
+
+async def generate_async(
+    competitor_name: str,
+    competitor_website: str,
+    article_text: str,
+    source_url: str = ""
+) -> Optional[dict]:
+    """Async version of generate() — same arguments and return value."""
+    
+    if not os.getenv("GEMINI_API_KEY"):
+        print("⚠️  GEMINI_API_KEY not found in environment variables")
+        return _mock_response(competitor_name, source_url)
+    
+    key = _cache_key(competitor_name, article_text, source_url)
+    cached = _cache_get(key)
+    if cached is not None:
+        print(f"✅ Cached: {cached['title']} (Threat Level: {cached['threat_level']})")
+        return cached
+    
+    response = None
+    try:
+        prompt = _build_prompt(competitor_name, competitor_website, article_text, source_url)
+        response = await _get_model().generate_content_async(prompt, generation_config=_GEN_CFG)
+        result = _parse_response(response)
+        if result is not None:
+            _cache_set(key, result)
         return result
         
     except json.JSONDecodeError as e:
@@ -143,6 +219,27 @@ def generate(
         return None
 
 
+async def generate_batch(items: list, max_concurrency: int = 10) -> list:
+    """
+    Analyze many articles concurrently.
+    
+    Args:
+        items: List of dicts with generate() keyword arguments
+               (competitor_name, competitor_website, article_text, source_url)
+        max_concurrency: Maximum in-flight Gemini requests (keep under your RPM quota)
+    
+    Returns:
+        List of results in the same order as items (None where analysis failed)
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def _bounded(item):
+        async with semaphore:
+            return await generate_async(**item)
+    
+    return await asyncio.gather(*[_bounded(item) for item in items])
+
+
 def _mock_response(competitor_name: str, source_url: str) -> dict:
     """Return a mock response for testing without API key"""
     print("   Using mock response for testing...")
@@ -1,19 +1,17 @@
-
 import sqlite3
+from contextlib import closing
 
 DB_PATH = "prisma/dev.db"
 
 def clear_news():
     print(f"Connecting to {DB_PATH}...")
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    with closing(sqlite3.connect(DB_PATH)) as conn, conn:
+        cursor = conn.cursor()
 
-    print("Clearing CompetitorNews...")
-    cursor.execute("DELETE FROM CompetitorNews")
-    print(f"  Deleted {cursor.rowcount} rows")
-    
-    conn.commit()
-    conn.close()
+        print("Clearing CompetitorNews...")
+        # SQLite has no TRUNCATE; an unqualified DELETE uses its truncate optimization
+        cursor.execute("DELETE FROM CompetitorNews")
+        print(f"  Deleted {cursor.rowcount} rows")
     print("Done.")
 
 if __name__ == "__main__":
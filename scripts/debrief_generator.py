@@ -5,11 +5,12 @@ Run locally: ./.venv/bin/python scripts/debrief_generator.py
 """
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
 import datetime
 import json
 import os
-import uuid
+import secrets
+from collections import namedtuple
+from contextlib import closing
 import anthropic
 from dotenv import load_dotenv
 
@@ -24,6 +25,13 @@ DATABASE_URL = _raw_db_url.split('?')[0] if _raw_db_url else None
 
 client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
 
+# Sonnet for the full-quality debrief; Haiku for quick low-latency drafts (--fast)
+DEBRIEF_MODEL = "claude-sonnet-4-5-20250929"
+FAST_DEBRIEF_MODEL = "claude-haiku-4-5"
+
+# Only the highest-scoring items are sent in full; the rest go as one-line summaries
+DETAILED_ITEMS = 20
+
 # Region relevance weights for CIMHSA
 # Higher = more strategically important to CIMHSA
 REGION_WEIGHTS = {
@@ -37,13 +45,33 @@ REGION_WEIGHTS = {
     'GLOBAL':         3,
 }
 
+# Relevance score computed in SQL: threat level (0-50) + region weight (0-10) + recency bonus.
+# Articles from the last few days get up to +5.
+_REGION_SCORE_SQL = (
+    "CASE UPPER(COALESCE(cn.region, 'GLOBAL')) "
+    + " ".join(f"WHEN '{region}' THEN {weight}" for region, weight in REGION_WEIGHTS.items())
+    + " ELSE 1 END"
+)
+RELEVANCE_SCORE_SQL = (
+    f'COALESCE(cn."threatLevel", 1) * 10 + {_REGION_SCORE_SQL} '
+    "+ GREATEST(0, 5 - EXTRACT(DAY FROM (%(end)s::timestamp - cn.date))::int)"
+)
+
 
 def generate_cuid():
-    return 'c' + uuid.uuid4().hex[:24]
+    return 'c' + secrets.token_hex(12)
 
 
 def get_db_connection():
-    return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+    return psycopg2.connect(DATABASE_URL)
+
+
+# Only the columns the debrief actually reads, as lightweight tuples.
+# region comes back already upper-cased with NULL mapped to GLOBAL.
+NewsRow = namedtuple('NewsRow', [
+    'id', 'title', 'date', 'threat_level', 'event_type',
+    'region', 'summary', 'source_url', 'competitor_name',
+])
 
 
 SYSTEM_PROMPT = """You are a strategic intelligence analyst for CIMHSA, a Brazilian manufacturer of CNC machine tools, industrial machinery, and automation solutions.
@@ -106,35 +134,20 @@ def fetch_recent_news(days=7):
     end = datetime.datetime.now(datetime.timezone.utc)
     start = end - datetime.timedelta(days=days)
 
-    cursor.execute("""
-        SELECT cn.*, c.name as competitor_name, c.industry
+    cursor.execute(f"""
+        SELECT cn.id, cn.title, cn.date, cn."threatLevel", cn."eventType",
+               UPPER(COALESCE(cn.region, 'GLOBAL')) as region,
+               cn.summary, cn."sourceUrl", c.name as competitor_name
         FROM "CompetitorNews" cn
         JOIN "Competitor" c ON cn."competitorId" = c.id
-        WHERE cn.date >= %s AND cn.date <= %s
-        ORDER BY cn."threatLevel" DESC, cn.date DESC
+        WHERE cn.date >= %(start)s AND cn.date <= %(end)s
+        ORDER BY {RELEVANCE_SCORE_SQL} DESC, cn."threatLevel" DESC, cn.date DESC
         LIMIT 60
-    """, (start.isoformat(), end.isoformat()))
+    """, {'start': start.isoformat(), 'end': end.isoformat()})
 
-    news = cursor.fetchall()
+    ranked = [NewsRow(*row) for row in cursor.fetchall()]
     conn.close()
 
-    # Score each item: threat level (0-50) + region weight (0-10) + recency bonus
-    def score(item):
-        threat = (item.get('threatLevel') or 1) * 10
-        region = (item.get('region') or 'GLOBAL').upper()
-        region_score = REGION_WEIGHTS.get(region, 1)
-        # Small recency bonus: articles from the last 3 days get +5
-        try:
-            item_date = item['date']
-            if isinstance(item_date, str):
-                item_date = datetime.datetime.fromisoformat(item_date.replace('Z', '+00:00'))
-            days_old = (end - item_date).days
-            recency = max(0, 5 - days_old)
-        except Exception:
-            recency = 0
-        return threat + region_score + recency
-
-    ranked = sorted(news, key=score, reverse=True)
     return ranked, start, end
 
 
@@ -146,24 +159,30 @@ def pick_top3(news_items):
 def format_news(news_items):
     """Format all news items for Claude."""
     lines = []
+    append = lines.append
     for i, item in enumerate(news_items, 1):
-        region = (item.get('region') or 'Global').upper()
-        lines.append(
-            f"{i}. [{item['competitor_name']}] {item['title']}\n"
-            f"   Date: {item['date']} | Threat: {item.get('threatLevel', '?')}/5 | "
-            f"Type: {item.get('eventType', '?')} | Region: {region}\n"
-            f"   Summary: {item.get('summary', '')}\n"
-            f"   Source: {item.get('sourceUrl', '')}\n"
+        append(
+            f"{i}. [{item.competitor_name}] {item.title}\n"
+            f"   Date: {item.date} | Threat: {item.threat_level}/5 | "
+            f"Type: {item.event_type} | Region: {item.region}\n"
+            f"   Summary: {item.summary}\n"
+            f"   Source: {item.source_url}\n"
         )
     return '\n'.join(lines)
 
 
-def generate_debrief(news_items, top3):
+def generate_debrief(news_items, top3, model=DEBRIEF_MODEL):
     """Generate debrief using Claude, with top-3 pre-highlighted."""
-    formatted_all = format_news(news_items)
+    formatted_all = format_news(news_items[:DETAILED_ITEMS])
+    tail = news_items[DETAILED_ITEMS:]
+    if tail:
+        formatted_all += "\n\nOther items:\n" + "\n".join(
+            f"- [{t.competitor_name}] {t.title} (T{t.threat_level}/5, {t.region})"
+            for t in tail
+        )
 
     top3_hint = "\n".join(
-        f"- [{t['competitor_name']}] {t['title']} (Threat {t.get('threatLevel','?')}/5, {(t.get('region') or 'Global').upper()})"
+        f"- [{t.competitor_name}] {t.title} (Threat {t.threat_level}/5, {t.region})"
         for t in top3
     )
 
@@ -177,8 +196,8 @@ def generate_debrief(news_items, top3):
 
     print("  Calling Claude API...")
     message = client.messages.create(
-        model="claude-sonnet-4-5-20250929",
-        max_tokens=4000,
+        model=model,
+        max_tokens=2500,  # Debrief structure is bounded
         system=SYSTEM_PROMPT,
         messages=[{"role": "user", "content": user_prompt}]
     )
@@ -187,31 +206,27 @@ def generate_debrief(news_items, top3):
 
 
 def save_debrief(content, period_start, period_end, item_count):
-    """Save debrief to database."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
+    """Save debrief to database (rolled back and closed if the insert fails)."""
     debrief_id = generate_cuid()
     now = datetime.datetime.now(datetime.timezone.utc)
 
-    cursor.execute("""
-        INSERT INTO "Debrief" (id, content, "periodStart", "periodEnd", "itemCount", "generatedAt")
-        VALUES (%s, %s, %s, %s, %s, %s)
-    """, (
-        debrief_id,
-        content,
-        period_start.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
-        period_end.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
-        item_count,
-        now.strftime('%Y-%m-%dT%H:%M:%S.000Z')
-    ))
-
-    conn.commit()
-    conn.close()
+    with closing(get_db_connection()) as conn, conn, conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO "Debrief" (id, content, "periodStart", "periodEnd", "itemCount", "generatedAt")
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (
+            debrief_id,
+            content,
+            period_start.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+            period_end.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+            item_count,
+            now.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+        ))
+
     return debrief_id
 
 
-def main(days=7):
+def main(days=7, fast=False):
     print("=" * 60)
     print("📊 CIMHSA WEEKLY INTELLIGENCE DEBRIEF GENERATOR")
     print("   Powered by Claude AI")
@@ -238,12 +253,12 @@ def main(days=7):
     top3 = pick_top3(news)
     print(f"\n🏆 Top 3 by relevance score:")
     for i, t in enumerate(top3, 1):
-        region = (t.get('region') or 'Global').upper()
-        print(f"   {i}. [{t['competitor_name']}] {t['title'][:60]} (T{t.get('threatLevel','?')}, {region})")
+        print(f"   {i}. [{t.competitor_name}] {t.title[:60]} (T{t.threat_level}, {t.region})")
 
     # Generate debrief
-    print("\n🤖 Generating debrief with Claude...")
-    content = generate_debrief(news, top3)
+    model = FAST_DEBRIEF_MODEL if fast else DEBRIEF_MODEL
+    print(f"\n🤖 Generating debrief with Claude ({model})...")
+    content = generate_debrief(news, top3, model=model)
     print(f"   Generated {len(content)} characters")
 
     # Save to database
@@ -261,5 +276,6 @@ if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description='Generate CIMHSA weekly intelligence debrief')
     parser.add_argument('--days', type=int, default=7, help='Number of days to look back (default: 7)')
+    parser.add_argument('--fast', action='store_true', help='Draft with Claude Haiku for lower latency')
     args = parser.parse_args()
-    main(days=args.days)
+    main(days=args.days, fast=args.fast)
@@ -1,21 +1,37 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from ddgs import DDGS
 
-def debug_signal(company, query_suffix):
-    print(f"\n--- SIGNAL SEARCH: {company} + {query_suffix} ---")
+def debug_signal(company, query_suffix, ddgs=None):
+    lines = [f"\n--- SIGNAL SEARCH: {company} + {query_suffix} ---"]
     try:
-        results = DDGS().text(f'"{company}" {query_suffix}', max_results=3)
+        results = (ddgs or DDGS()).text(f'"{company}" {query_suffix}', max_results=3)
         if not results:
-            print("NO RESULTS")
+            lines.append("NO RESULTS")
         else:
             for res in results:
-                print(f"- {res.get('title')} ({res.get('href')})")
-                print(f"  Snippet: {res.get('body')[:100]}...")
+                lines.append(f"- {res.get('title')} ({res.get('href')})")
+                lines.append(f"  Snippet: {res.get('body')[:100]}...")
     except Exception as e:
-        print(f"Error: {e}")
+        lines.append(f"Error: {e}")
+    return "\n".join(lines)
 
 if __name__ == "__main__":
-    debug_signal("ViaDirect", "hiring OR jobs")
-    debug_signal("Abuzz", "new project OR contract")
-    debug_signal("Mappedin", "investment OR funding")
+    queries = [
+        ("ViaDirect", "hiring OR jobs"),
+        ("Abuzz", "new project OR contract"),
+        ("Mappedin", "investment OR funding"),
+    ]
+    # DDGS keeps per-instance request state and isn't documented as thread-safe,
+    # so each worker thread gets its own instance.
+    # Searches run concurrently; output is printed afterwards so it doesn't interleave
+    local = threading.local()
 
+    def worker(q):
+        if not hasattr(local, 'ddgs'):
+            local.ddgs = DDGS()
+        return debug_signal(*q, ddgs=local.ddgs)
 
+    with ThreadPoolExecutor(max_workers=len(queries)) as ex:
+        for output in ex.map(worker, queries):
+            print(output)
@@ -7,21 +7,29 @@ Target Markets: South America (Brazil, Argentina, Colombia, Chile) — primary
 """
 
 import asyncio
-import random
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import atexit
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import datetime
+import functools
+from contextlib import contextmanager
 import hashlib
+import itertools
 import httpx
 import json
+import orjson
 import os
 import time
-import uuid
+import secrets
 import re
 import requests
+import sqlite3
+import threading
 import anthropic
+from aiolimiter import AsyncLimiter
 from google import genai as google_genai
 from google.genai import types as genai_types
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
 
 # Load .env.local first, then .env as fallback
@@ -46,73 +54,149 @@ PRIORITY_COMPETITORS = [
     "Indústrias Romi", "Fagor Automation", "DMG Mori", "Mazak",
     "Haas Automation", "Trumpf", "Okuma", "Sandvik", "Makino", "Hermle",
 ]
+_PRIORITY_RANK = {name: i for i, name in enumerate(PRIORITY_COMPETITORS)}
 
-# --- Serper API cache (file-based, 7-day TTL) ---
-SERPER_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache', 'serper')
+# --- Search result cache (single SQLite file, one table per source) ---
+CACHE_DB_PATH = os.path.join(os.path.dirname(__file__), 'cache', 'search_cache.db')
 SERPER_CACHE_TTL = 7 * 24 * 3600  # 7 days in seconds
+GEMINI_CACHE_TTL = 24 * 3600  # 1 day in seconds
 
-# Global semaphore for Serper rate limiting (initialized in async main)
-SERPER_SEMAPHORE = None
+_cache_db = None
+_cache_lock = threading.Lock()
 
+# Serper rate limiting: a token bucket bounds requests/second, a semaphore bounds in-flight requests
+SERPER_QPS = int(os.getenv("SERPER_QPS", "5"))
+_SERPER_LIMITER = AsyncLimiter(max_rate=SERPER_QPS, time_period=1.0)
+_SERPER_CONCURRENCY = asyncio.Semaphore(10)
 
-def _serper_cache_key(query, region, search_type):
-    raw = f"{query}|{region}|{search_type}"
-    return hashlib.md5(raw.encode()).hexdigest()
+# Gemini rate limiting: one shared bucket for the news and deep searches (requests/minute)
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "60"))
+_GEMINI_LIMITER = AsyncLimiter(max_rate=GEMINI_RPM, time_period=60)
 
+# Shared HTTP/2 client for Serper — keeps connections alive across the whole run
+_http_client = None
 
-def _cache_get(query, region, search_type):
-    key = _serper_cache_key(query, region, search_type)
-    cache_file = os.path.join(SERPER_CACHE_DIR, f"{key}.json")
-    if os.path.exists(cache_file):
-        try:
-            with open(cache_file) as f:
-                data = json.load(f)
-            age = time.time() - data.get('cached_at', 0)
-            if age < SERPER_CACHE_TTL:
-                return data.get('results', [])
-        except Exception:
-            pass
+
+def get_http_client():
+    """Return the run-wide httpx.AsyncClient, creating it on first use."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(30.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+# Shared async Claude client — one pooled connection set for every competitor's batches.
+# The semaphore bounds in-flight Claude calls across all competitors and batches.
+_async_claude = None
+_CLAUDE_CONCURRENCY = asyncio.Semaphore(int(os.getenv("CLAUDE_CONCURRENCY", "8")))
+
+
+def get_async_claude():
+    """Return the run-wide anthropic.AsyncAnthropic, creating it on first use."""
+    global _async_claude
+    if _async_claude is None:
+        _async_claude = anthropic.AsyncAnthropic(
+            api_key=ANTHROPIC_API_KEY,
+            http_client=httpx.AsyncClient(
+                timeout=httpx.Timeout(120.0),
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+            ),
+        )
+    return _async_claude
+
+
+async def close_async_claude():
+    global _async_claude
+    if _async_claude is not None:
+        await _async_claude.close()
+        _async_claude = None
+
+
+def _get_cache_db():
+    global _cache_db
+    if _cache_db is None:
+        os.makedirs(os.path.dirname(CACHE_DB_PATH), exist_ok=True)
+        db = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        for table in ('serper_cache', 'gemini_cache'):
+            db.execute(f'CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, cached_at REAL, results BLOB)')
+        db.commit()
+        _cache_db = db
+    return _cache_db
+
+
+def _cache_read(table, key, ttl):
+    try:
+        with _cache_lock:
+            row = _get_cache_db().execute(
+                f'SELECT results FROM {table} WHERE key = ? AND cached_at > ?',
+                (key, time.time() - ttl)
+            ).fetchone()
+        if row:
+            return orjson.loads(row[0])
+    except Exception:
+        pass
     return None
 
 
-def _cache_set(query, region, search_type, results):
-    os.makedirs(SERPER_CACHE_DIR, exist_ok=True)
-    key = _serper_cache_key(query, region, search_type)
-    cache_file = os.path.join(SERPER_CACHE_DIR, f"{key}.json")
+def _cache_write(table, key, results):
     try:
-        with open(cache_file, 'w') as f:
-            json.dump({'cached_at': time.time(), 'results': results}, f)
+        with _cache_lock:
+            db = _get_cache_db()
+            db.execute(
+                f'INSERT OR REPLACE INTO {table} (key, cached_at, results) VALUES (?, ?, ?)',
+                (key, time.time(), orjson.dumps(results))
+            )
+            db.commit()
     except Exception:
         pass
 
-# --- Gemini search cache (file-based, 1-day TTL) ---
-GEMINI_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache', 'gemini')
-GEMINI_CACHE_TTL = 24 * 3600  # 1 day in seconds
+
+def _hash_key(raw):
+    """128-bit BLAKE2b digest — faster than MD5 and plenty for cache keys."""
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def _serper_cache_key(query, region, search_type):
+    return _hash_key(f"{query}|{region}|{search_type}")
+
+
+def _cache_get(query, region, search_type):
+    return _cache_read('serper_cache', _serper_cache_key(query, region, search_type), SERPER_CACHE_TTL)
+
+
+def _cache_set(query, region, search_type, results):
+    _cache_write('serper_cache', _serper_cache_key(query, region, search_type), results)
+
+
+def _gemini_cache_key(name):
+    return _hash_key(name.lower())
 
 
 def _gemini_cache_get(name):
-    key = hashlib.md5(name.lower().encode()).hexdigest()
-    path = os.path.join(GEMINI_CACHE_DIR, f"{key}.json")
-    if os.path.exists(path):
-        try:
-            with open(path) as f:
-                data = json.load(f)
-            if time.time() - data.get('cached_at', 0) < GEMINI_CACHE_TTL:
-                return data.get('results', [])
-        except Exception:
-            pass
-    return None
+    return _cache_read('gemini_cache', _gemini_cache_key(name), GEMINI_CACHE_TTL)
 
 
 def _gemini_cache_set(name, results):
-    os.makedirs(GEMINI_CACHE_DIR, exist_ok=True)
-    key = hashlib.md5(name.lower().encode()).hexdigest()
-    path = os.path.join(GEMINI_CACHE_DIR, f"{key}.json")
-    try:
-        with open(path, 'w') as f:
-            json.dump({'cached_at': time.time(), 'results': results}, f)
-    except Exception:
-        pass
+    _cache_write('gemini_cache', _gemini_cache_key(name), results)
+
+
+# A whole list-item line ("* ..." or "- ...", optionally indented), without its newline
+_BULLET_LINE_RE = re.compile(r'^[^\S\n]*[*-][^\n]*', re.MULTILINE)
+# The leading list marker of a stripped bullet line
+_BULLET_MARKER_RE = re.compile(r'^[\*\-]\s*')
 
 
 def _parse_gemini_grounding(response):
@@ -135,48 +219,58 @@ def _parse_gemini_grounding(response):
 
     chunks = getattr(grounding, 'grounding_chunks', []) or []
     supports = getattr(grounding, 'grounding_supports', []) or []
+    if not chunks or not supports:
+        return articles
     
-    # Map text lines to chunks via overlap with supports
-    current_idx = 0
-    lines = text.split('\n')
-    
+    # Supports sorted by segment start. Lines are visited in text order, so a sweep
+    # keeps only the supports that can still overlap the current line.
+    # Guard: segment or its indices can be None on some Gemini responses; empty segments never overlap
+    valid_supports = sorted(
+        (
+            (support.segment.start_index, support.segment.end_index, order, support)
+            for order, support in enumerate(supports)
+            if support.segment is not None
+            and support.segment.start_index is not None
+            and support.segment.end_index is not None
+            and support.segment.start_index < support.segment.end_index
+        ),
+        key=lambda entry: entry[0],
+    )
+    next_support = 0
+    active = []
+
+    # Map list-item lines to chunks via overlap with supports.
+    # The regex yields only bullet lines, with their offsets, in one scan.
     processed_urls = set()
 
-    for line in lines:
-        line_len = len(line)
-        start = current_idx
-        end = current_idx + line_len
-        current_idx = end + 1 # count the newline
-        
-        line_clean = line.strip()
-        # Only process list items
-        if not (line_clean.startswith('*') or line_clean.startswith('-')):
-            continue
+    for m in _BULLET_LINE_RE.finditer(text):
+        start, end = m.span()
+        line_clean = m.group().strip()
+
+        # Overlap: seg.start < end and seg.end > start
+        while next_support < len(valid_supports) and valid_supports[next_support][0] < end:
+            active.append(valid_supports[next_support])
+            next_support += 1
+        active = [entry for entry in active if entry[1] > start]
             
-        # Find overlapping supports
+        # Find overlapping supports (in original order, so ties resolve as before)
         best_chunk_idx = -1
         max_score = 0.0
         
-        for support in supports:
-            seg = support.segment
-            # Guard: segment or its indices can be None on some Gemini responses
-            if seg is None or seg.start_index is None or seg.end_index is None:
-                continue
-            # Check overlap: start < seg.end and end > seg.start
-            if max(start, seg.start_index) < min(end, seg.end_index):
-                indices = support.grounding_chunk_indices
-                scores = support.confidence_scores
-                
-                for idx, score in zip(indices, scores):
-                    if score > max_score:
-                         if 0 <= idx < len(chunks):
-                             chunk = chunks[idx]
-                             if hasattr(chunk, 'web') and chunk.web:
-                                 uri = getattr(chunk.web, 'uri', None)
-                                 # Skip if not news url
-                                 if uri and is_news_url(uri):
-                                     max_score = score
-                                     best_chunk_idx = idx
+        for _, _, _, support in sorted(active, key=lambda entry: entry[2]):
+            indices = support.grounding_chunk_indices
+            scores = support.confidence_scores
+            
+            for idx, score in zip(indices, scores):
+                if score > max_score:
+                     if 0 <= idx < len(chunks):
+                         chunk = chunks[idx]
+                         if hasattr(chunk, 'web') and chunk.web:
+                             uri = getattr(chunk.web, 'uri', None)
+                             # Skip if not news url
+                             if uri and is_news_url(uri):
+                                 max_score = score
+                                 best_chunk_idx = idx
 
         if best_chunk_idx != -1:
              chunk = chunks[best_chunk_idx]
@@ -190,7 +284,7 @@ def _parse_gemini_grounding(response):
              title_source = getattr(chunk.web, 'title', None)
              
              # Clean snippet: remove markers
-             snippet = re.sub(r'^[\*\-]\s*', '', line_clean)
+             snippet = _BULLET_MARKER_RE.sub('', line_clean, count=1)
              snippet = snippet.replace('**', '')
              
              # Use snippet as title if extracted title is missing or generic
@@ -207,13 +301,43 @@ def _parse_gemini_grounding(response):
     return articles
 
 
+_PAREN_RE = re.compile(r'\s*\(.*?\)')
+
+
+@functools.lru_cache(maxsize=2048)
+def _clean_name(name):
+    """Competitor name without parenthesised qualifiers, e.g. 'Romi (BR)' -> 'Romi'"""
+    return _PAREN_RE.sub('', name).strip()
+
+
+# Gemini prompts are built once; only the competitor, domain and window vary per call
+# CIMHSA SPECIFIC PROMPT: Machine Manufacturing
+GEMINI_NEWS_PROMPT = (
+    "Search for recent news (last {days_back} days) about '{name}', a machine tool or industrial machinery manufacturer. "
+    "Focus on: new factory openings, major contract wins, government tenders, "
+    "partnerships, acquisitions, new CNC or automation product launches. "
+    "Prioritize news from South America (Brazil, Argentina, Colombia, Chile), "
+    "Europe (Spain, Germany, Italy, France), and North America (USA, Mexico). "
+    "Please provide a bulleted list of the articles you find, including their dates."
+)
+GEMINI_DEEP_PROMPT = (
+    "Find any press releases, news announcements, or blog posts from or about "
+    "'{name}' (website: {domain}) published in the last {days_back} days. "
+    "Also search trade publications (Metal Working News, Modern Machine Shop, "
+    "Metalurgia e Mecânica, Maquinas e Metais, Interempresas Metalmecanica) "
+    "and industry blogs for any coverage of {name} in the machine tool / "
+    "industrial machinery sector. "
+    "Please provide a bulleted list of the articles you find, including their dates."
+)
+
+
 def search_gemini(competitor_name, days_back=7):
     """Search for news using Gemini 2.0 Flash with Google Search grounding.
     """
     if not GEMINI_API_KEY or not _gemini_client:
         return []
 
-    search_name = re.sub(r'\s*\(.*?\)', '', competitor_name).strip()
+    search_name = _clean_name(competitor_name)
 
     cached = _gemini_cache_get(search_name)
     if cached is not None:
@@ -221,15 +345,7 @@ def search_gemini(competitor_name, days_back=7):
         return cached
 
     try:
-        # CIMHSA SPECIFIC PROMPT: Machine Manufacturing
-        prompt = (
-            f"Search for recent news (last {days_back} days) about '{search_name}', a machine tool or industrial machinery manufacturer. "
-            f"Focus on: new factory openings, major contract wins, government tenders, "
-            f"partnerships, acquisitions, new CNC or automation product launches. "
-            f"Prioritize news from South America (Brazil, Argentina, Colombia, Chile), "
-            f"Europe (Spain, Germany, Italy, France), and North America (USA, Mexico). "
-            f"Please provide a bulleted list of the articles you find, including their dates."
-        )
+        prompt = GEMINI_NEWS_PROMPT.format(name=search_name, days_back=days_back)
         response = _gemini_client.models.generate_content(
             model='gemini-2.0-flash',
             contents=prompt,
@@ -253,14 +369,16 @@ def search_gemini(competitor_name, days_back=7):
 # ASYNC SEARCH LAYER
 # ---------------------------------------------------------------------------
 
+def _resolve_region(region):
+    """Return (serper config, cache/display label) for a REGIONS key or a native-region config."""
+    if isinstance(region, dict):
+        return region, region.get('_label', f"{region.get('gl', '?')}_{region.get('hl', '?')}")
+    return REGIONS.get(region, REGIONS['global']), region
+
+
 async def search_serper_async(query, search_type='news', region='global', num_results=10, tbs_val=None):
     """Async version of search_serper()"""
-    if isinstance(region, dict):
-        region_config = region
-        region_label = region.get('_label', f"{region.get('gl', '?')}_{region.get('hl', '?')}")
-    else:
-        region_config = REGIONS.get(region, REGIONS['global'])
-        region_label = region
+    region_config, region_label = _resolve_region(region)
 
     cached = _cache_get(query, region_label, search_type)
     if cached is not None:
@@ -275,22 +393,17 @@ async def search_serper_async(query, search_type='news', region='global', num_re
         payload["tbs"] = tbs_val
 
     try:
-        global SERPER_SEMAPHORE
-        if SERPER_SEMAPHORE is None:
-             SERPER_SEMAPHORE = asyncio.Semaphore(3)
-        
-        async with SERPER_SEMAPHORE:
-            async with httpx.AsyncClient(timeout=30.0) as http:
-                response = await http.post(
-                    f"https://google.serper.dev/{search_type}",
-                    json=payload,
-                    headers={"X-API-KEY": SERPER_API_KEY, "Content-Type": "application/json"}
-                )
+        async with _SERPER_LIMITER, _SERPER_CONCURRENCY:
+            response = await get_http_client().post(
+                f"https://google.serper.dev/{search_type}",
+                json=payload,
+                headers={"X-API-KEY": SERPER_API_KEY, "Content-Type": "application/json"}
+            )
         if response.status_code in (400, 403) and "credits" in response.text.lower():
             print("      ❌ Serper credits exhausted!")
             return []
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         results = data.get('news' if search_type == 'news' else 'organic', [])
         print(f"      [API]    {region_label}: {query[:60]}")
         _cache_set(query, region_label, search_type, results)
@@ -300,9 +413,57 @@ async def search_serper_async(query, search_type='news', region='global', num_re
         return []
 
 
+async def search_serper_batch_async(queries, search_type='news', region='global', num_results=10, tbs_val=None):
+    """Run several queries for one region in a single Serper batch request.
+    Returns one result list per query, in order. Cached queries are not re-sent.
+    """
+    region_config, region_label = _resolve_region(region)
+
+    results = [None] * len(queries)
+    pending = []
+    for i, query in enumerate(queries):
+        cached = _cache_get(query, region_label, search_type)
+        if cached is not None:
+            print(f"      [CACHED] {region_label}: {query[:60]}")
+            results[i] = cached
+        else:
+            pending.append(i)
+
+    if not pending or not SERPER_API_KEY:
+        return [r if r is not None else [] for r in results]
+
+    payload = []
+    for i in pending:
+        item = {"q": queries[i], "gl": region_config['gl'], "hl": region_config['hl'], "num": num_results}
+        if tbs_val:
+            item["tbs"] = tbs_val
+        payload.append(item)
+
+    try:
+        async with _SERPER_LIMITER, _SERPER_CONCURRENCY:
+            response = await get_http_client().post(
+                f"https://google.serper.dev/{search_type}",
+                json=payload,
+                headers={"X-API-KEY": SERPER_API_KEY, "Content-Type": "application/json"}
+            )
+        if response.status_code in (400, 403) and "credits" in response.text.lower():
+            print("      ❌ Serper credits exhausted!")
+        else:
+            response.raise_for_status()
+            key = 'news' if search_type == 'news' else 'organic'
+            for i, data in zip(pending, orjson.loads(response.content)):
+                results[i] = data.get(key, [])
+                _cache_set(queries[i], region_label, search_type, results[i])
+            print(f"      [API]    {region_label}: batch of {len(pending)} queries")
+    except Exception as e:
+        print(f"      Serper batch error: {e}")
+
+    return [r if r is not None else [] for r in results]
+
+
 async def search_news_async(competitor_name, regions_to_search, days_back=None, native_region=None):
-    """Async version — fires ALL (query × region) Serper combinations concurrently."""
-    search_name = re.sub(r'\s*\(.*?\)', '', competitor_name).strip()
+    """Async version — one batched Serper request per region, all regions concurrently."""
+    search_name = _clean_name(competitor_name)
     
     # CIMHSA SPECIFIC QUERIES: Machine Tool / Industrial Machinery (EN, ES, PT)
     # Positive: industry-specific terms that anchor results to manufacturing news.
@@ -323,70 +484,59 @@ async def search_news_async(competitor_name, regions_to_search, days_back=None,
         f'"{search_name}" (frota OR usinagem OR mecanizado OR "laser de fibra" OR "corte a laser") {_neg}',
     ]
 
-    # Build all (query, region) task pairs
-    task_pairs = []
-    for region in regions_to_search:
-        for query in queries:
-            task_pairs.append((region, query))
+    # One batched Serper request per region (all queries share that region's gl/hl)
+    search_regions = list(regions_to_search)
     if native_region:
-        for query in queries:
-            task_pairs.append((native_region, query))
+        search_regions.append(native_region)
 
-    tasks = [search_serper_async(q, 'news', r, 10) for r, q in task_pairs]
-    results_lists = await asyncio.gather(*tasks, return_exceptions=True)
+    tasks = [search_serper_batch_async(queries, 'news', r, 10) for r in search_regions]
+    batch_results = await asyncio.gather(*tasks, return_exceptions=True)
 
     seen_urls = set()
     all_results = []
     filtered = 0
-    for (region_key, _), result in zip(task_pairs, results_lists):
-        if isinstance(result, Exception):
+    for region_key, batch in zip(search_regions, batch_results):
+        if isinstance(batch, Exception):
             continue
-        for r in result:
-            url = r.get('link', '')
-            if url and url not in seen_urls:
-                seen_urls.add(url)
-                if is_news_url(url):
-                    label = region_key if isinstance(region_key, str) else region_key.get('_label', 'native')
-                    r['_search_region'] = label
-                    all_results.append(r)
-                else:
-                    filtered += 1
+        # One label per region batch, not per article
+        label = region_key if isinstance(region_key, str) else region_key.get('_label', 'native')
+        for result in batch:
+            for r in result:
+                url = r.get('link', '')
+                if url and url not in seen_urls:
+                    seen_urls.add(url)
+                    if is_news_url(url):
+                        r['_search_region'] = label
+                        all_results.append(r)
+                    else:
+                        filtered += 1
     if filtered > 0:
         print(f" ({filtered} filtered)", end="")
     return all_results
 
 
 async def search_gemini_async(competitor_name, days_back=7):
-    """Async Gemini search with per-call jitter."""
+    """Async Gemini search, paced by the shared _GEMINI_LIMITER (GEMINI_RPM)."""
     if not GEMINI_API_KEY or not _gemini_client:
         return []
 
-    search_name = re.sub(r'\s*\(.*?\)', '', competitor_name).strip()
+    search_name = _clean_name(competitor_name)
 
     cached = _gemini_cache_get(search_name)
     if cached is not None:
         print(f"      [GEMINI-CACHED] {search_name}: {len(cached)} articles")
         return cached
 
-    await asyncio.sleep(random.uniform(1.0, 3.0))
-
     try:
-        # CIMHSA SPECIFIC PROMPT
-        prompt = (
-            f"Search for recent news (last {days_back} days) about '{search_name}', a machine tool or industrial machinery manufacturer. "
-            f"Focus on: new factory openings, major contract wins, government tenders, "
-            f"partnerships, acquisitions, new CNC or automation product launches. "
-            f"Prioritize news from South America (Brazil, Argentina, Colombia, Chile), "
-            f"Europe (Spain, Germany, Italy, France), and North America (USA, Mexico). "
-            f"Please provide a bulleted list of the articles you find, including their dates."
-        )
-        response = await _gemini_client.aio.models.generate_content(
-            model='gemini-2.0-flash',
-            contents=prompt,
-            config=genai_types.GenerateContentConfig(
-                tools=[genai_types.Tool(google_search=genai_types.GoogleSearch())]
+        prompt = GEMINI_NEWS_PROMPT.format(name=search_name, days_back=days_back)
+        async with _GEMINI_LIMITER:
+            response = await _gemini_client.aio.models.generate_content(
+                model='gemini-2.0-flash',
+                contents=prompt,
+                config=genai_types.GenerateContentConfig(
+                    tools=[genai_types.Tool(google_search=genai_types.GoogleSearch())]
+                )
             )
-        )
         articles = _parse_gemini_grounding(response)
         print(f"      [GEMINI]  {search_name}: {len(articles)} articles found")
         _gemini_cache_set(search_name, articles)
@@ -405,28 +555,19 @@ async def search_gemini_deep_async(competitor_name, website, days_back=7):
     if not GEMINI_API_KEY or not _gemini_client or not website:
         return []
 
-    search_name = re.sub(r'\s*\(.*?\)', '', competitor_name).strip()
+    search_name = _clean_name(competitor_name)
     domain = re.sub(r'^https?://', '', website).rstrip('/')
 
-    await asyncio.sleep(random.uniform(1.5, 3.0))
-
     try:
-        prompt = (
-            f"Find any press releases, news announcements, or blog posts from or about "
-            f"'{search_name}' (website: {domain}) published in the last {days_back} days. "
-            f"Also search trade publications (Metal Working News, Modern Machine Shop, "
-            f"Metalurgia e Mecânica, Maquinas e Metais, Interempresas Metalmecanica) "
-            f"and industry blogs for any coverage of {search_name} in the machine tool / "
-            f"industrial machinery sector. "
-            f"Please provide a bulleted list of the articles you find, including their dates."
-        )
-        response = await _gemini_client.aio.models.generate_content(
-            model='gemini-2.0-flash',
-            contents=prompt,
-            config=genai_types.GenerateContentConfig(
-                tools=[genai_types.Tool(google_search=genai_types.GoogleSearch())]
+        prompt = GEMINI_DEEP_PROMPT.format(name=search_name, domain=domain, days_back=days_back)
+        async with _GEMINI_LIMITER:
+            response = await _gemini_client.aio.models.generate_content(
+                model='gemini-2.0-flash',
+                contents=prompt,
+                config=genai_types.GenerateContentConfig(
+                    tools=[genai_types.Tool(google_search=genai_types.GoogleSearch())]
+                )
             )
-        )
         articles = _parse_gemini_grounding(response)
         if articles:
             print(f"      [GEMINI-DEEP] {search_name}: {len(articles)} articles found")
@@ -481,6 +622,7 @@ HQ_NATIVE_REGIONS = {
     'korea':        {'gl': 'kr', 'hl': 'ko', '_label': 'korea_ko'},
 }
 
+@functools.lru_cache(maxsize=4096)
 def get_native_region(headquarters):
     """Return native language search config for a non-English-speaking HQ, or None."""
     if not headquarters:
@@ -494,28 +636,48 @@ def get_native_region(headquarters):
             return config
     return None
 
-# URLs that indicate non-news content
-BLOCKED_URL_PATTERNS = [
+# URLs that indicate non-news content.
+# Hosts are matched on the domain (subdomains included), brands on any host label,
+# and page types on the first word of any path segment ("/about-us", "/products/x").
+BLOCKED_HOSTS = frozenset({
     'linkedin.com', 'crunchbase.com', 'facebook.com', 'instagram.com',
     'youtube.com', 'twitter.com', 'x.com',
-    '/product', '/products', '/catalog', '/catalogo',
-    '/shop', '/store', '/loja', '/tienda',
-    '/contact', '/contato', '/about', '/sobre',
-    'mercadolivre', 'mercadolibre', 'amazon.com', 'alibaba.com',
-    'olx.com', 'ebay.com',
-    'glassdoor.com', 'indeed.com', 'ziprecruiter.com',
-    'wikipedia.org', 'dnb.com', 'zoominfo.com',
-    '/careers', '/vagas', '/empleo',
-]
+    'ziprecruiter.com', 'wikipedia.org', 'dnb.com', 'zoominfo.com',
+})
+# Marketplaces and job boards that run per-country domains (olx.com.br, amazon.com.mx, ...)
+BLOCKED_HOST_LABELS = frozenset({
+    'mercadolivre', 'mercadolibre', 'amazon', 'alibaba', 'olx', 'ebay',
+    'glassdoor', 'indeed',
+})
+BLOCKED_PATH_WORDS = frozenset({
+    'product', 'products', 'catalog', 'catalogo',
+    'shop', 'store', 'loja', 'tienda',
+    'contact', 'contato', 'about', 'sobre',
+    'careers', 'vagas', 'empleo',
+})
+
+_PATH_WORD_RE = re.compile(r'[a-z0-9]+')
 
 
 def is_news_url(url):
     """Filter out product pages, sales sites, social media, and company profiles"""
     if not url:
         return False
-    url_lower = url.lower()
-    for pattern in BLOCKED_URL_PATTERNS:
-        if pattern in url_lower:
+    try:
+        parts = urlsplit(url.lower())
+    except ValueError:
+        return False
+
+    labels = (parts.hostname or '').split('.')
+    for i in range(len(labels) - 1):
+        if '.'.join(labels[i:]) in BLOCKED_HOSTS:
+            return False
+    if not BLOCKED_HOST_LABELS.isdisjoint(labels):
+        return False
+
+    for segment in parts.path.split('/'):
+        word = _PATH_WORD_RE.match(segment)
+        if word and word.group() in BLOCKED_PATH_WORDS:
             return False
     return True
 
@@ -600,177 +762,280 @@ DATE EXTRACTION INSTRUCTIONS:
 - If no date is found, use the current date.
 - Return ONLY valid JSON."""
 
+# Only the articles block changes per batch; the head and tail are formatted once per competitor
+_PROMPT_HEAD, _PROMPT_TAIL = ANALYSIS_PROMPT.split('{articles}')
+
+
+# One translate() pass: drop control characters and map typographic punctuation to ASCII.
+# Remaining non-ASCII is dropped by the encode below.
+_SANITIZE_TABLE = str.maketrans({
+    **{cp: None for cp in [*range(0x00, 0x09), 0x0b, 0x0c, *range(0x0e, 0x20), *range(0x7f, 0xa0)]},
+    '\u2018': "'", '\u2019': "'",
+    '\u201c': '"', '\u201d': '"',
+    '\u2013': '-', '\u2014': '-',
+    '\u2026': '...',
+    '\u00a0': ' ',
+})
+
 
 def sanitize_text(text):
     """Remove problematic characters"""
     if not text:
         return ""
-    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', str(text))
-    replacements = {
-        '\u2018': "'", '\u2019': "'",
-        '\u201c': '"', '\u201d': '"',
-        '\u2013': '-', '\u2014': '-',
-        '\u2026': '...',
-        '\u00a0': ' ',
-    }
-    for old, new in replacements.items():
-        text = text.replace(old, new)
-    try:
-        text = text.encode('ascii', 'ignore').decode('ascii')
-    except:
-        pass
-    return text.strip()
+    text = str(text).translate(_SANITIZE_TABLE)
+    return text.encode('ascii', 'ignore').decode('ascii').strip()
 
 
 def generate_cuid():
-    return 'c' + uuid.uuid4().hex[:24]
+    return 'c' + secrets.token_hex(12)
+
+
+# Connections are pooled for the whole run instead of reconnecting (TLS handshake) per call
+DB_POOL_SIZE = 8
+_pg_pool = None
+_pg_pool_lock = threading.Lock()
+# DB work started from the event loop is capped at the pool size so getconn() never finds the pool exhausted
+_DB_SLOTS = asyncio.Semaphore(DB_POOL_SIZE)
 
 
 def get_db_connection():
-    return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+    """Borrow a connection from the pool; hand it back with release_db_connection()."""
+    global _pg_pool
+    with _pg_pool_lock:
+        if _pg_pool is None:
+            _pg_pool = ThreadedConnectionPool(1, DB_POOL_SIZE, DATABASE_URL, cursor_factory=RealDictCursor)
+    return _pg_pool.getconn()
 
 
-def get_competitors():
-    """Fetch competitors from database, sorted by priority"""
+def release_db_connection(conn):
+    _pg_pool.putconn(conn)
+
+
+def close_db_pool():
+    global _pg_pool
+    with _pg_pool_lock:
+        if _pg_pool is not None:
+            _pg_pool.closeall()
+            _pg_pool = None
+
+
+# Sync callers that never reach fetch_all_news()'s cleanup still close the pool on exit
+atexit.register(close_db_pool)
+
+
+@contextmanager
+def db_connection():
+    """Borrow a pooled connection for a with-block; it is returned even if the block raises."""
     conn = get_db_connection()
-    cursor = conn.cursor()
+    try:
+        yield conn
+    finally:
+        release_db_connection(conn)
 
-    cursor.execute("""
-        SELECT id, name, website, industry, region, headquarters
-        FROM "Competitor"
-        WHERE status = 'active' OR status IS NULL
-    """)
-    all_competitors = cursor.fetchall()
-    conn.close()
+
+def get_competitors():
+    """Fetch competitors from database, sorted by priority"""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, name, website, industry, region, headquarters
+            FROM "Competitor"
+            WHERE status = 'active' OR status IS NULL
+        """)
+        all_competitors = cursor.fetchall()
 
     def sort_key(c):
         name = c['name']
-        if name in PRIORITY_COMPETITORS:
-            return (0, PRIORITY_COMPETITORS.index(name))
+        rank = _PRIORITY_RANK.get(name)
+        if rank is not None:
+            return (0, rank)
         else:
             return (1, name)
 
     return sorted(all_competitors, key=sort_key)
 
 
-def check_existing_url(cursor, url):
-    """Check if URL already exists in database"""
-    cursor.execute('SELECT id FROM "CompetitorNews" WHERE "sourceUrl" = %s', (url,))
-    return cursor.fetchone() is not None
-
-
-def save_news_item(competitor_id, news_item, days_back=None):
-    """Save news item to database"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    source_url = sanitize_text(news_item.get('source_url', ''))
-    
-    if not source_url or 'example.com' in source_url:
-        conn.close()
-        return False, "invalid_url"
+def prefilter_duplicates(cursor, competitor_id, urls, titles):
+    """Return (known URLs, known titles for this competitor) among the candidates in one query"""
+    cursor.execute("""
+        SELECT "sourceUrl", "competitorId", title FROM "CompetitorNews"
+        WHERE "sourceUrl" = ANY(%s) OR ("competitorId" = %s AND title = ANY(%s))
+    """, (list(urls), competitor_id, list(titles)))
+    known_urls = set()
+    known_titles = set()
+    for row in cursor.fetchall():
+        known_urls.add(row['sourceUrl'])
+        if row['competitorId'] == competitor_id:
+            known_titles.add(row['title'])
+    return known_urls, known_titles
+
+
+def _prepare_news_row(competitor_id, news_item, source_url, title, days_back, now):
+    """Validate one news item and build its INSERT row. Returns (row, None) or (None, skip_reason)."""
+    news_id = generate_cuid()
+    iso_now_str = now.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+    summary = sanitize_text(news_item.get('summary', ''))[:1000]
+    event_type = sanitize_text(news_item.get('event_type', 'Unknown'))[:100]
+    region = news_item.get('region', 'GLOBAL')
     
-    if check_existing_url(cursor, source_url):
-        conn.close()
-        return False, "duplicate_url"
-
-    title_check = sanitize_text(news_item.get('title', 'Untitled'))[:200]
-    cursor.execute('SELECT id FROM "CompetitorNews" WHERE "competitorId" = %s AND "title" = %s', (competitor_id, title_check))
-    if cursor.fetchone():
-        conn.close()
-        return False, "duplicate_title"
+    threat_level = news_item.get('threat_level', 2)
+    try:
+        threat_level = int(threat_level)
+    except:
+        threat_level = 2
+    threat_level = max(1, min(5, threat_level))
     
+    date_str = news_item.get('date', now.strftime('%Y-%m-%d'))
     try:
-        news_id = generate_cuid()
-        now = datetime.datetime.now(datetime.timezone.utc)
-        iso_now_str = now.strftime('%Y-%m-%dT%H:%M:%S.000Z')
-
-        title = sanitize_text(news_item.get('title', 'Untitled'))[:200]
-        summary = sanitize_text(news_item.get('summary', ''))[:1000]
-        event_type = sanitize_text(news_item.get('event_type', 'Unknown'))[:100]
-        region = news_item.get('region', 'GLOBAL')
-        
-        threat_level = news_item.get('threat_level', 2)
-        try:
-            threat_level = int(threat_level)
-        except:
-            threat_level = 2
-        threat_level = max(1, min(5, threat_level))
-        
-        date_str = news_item.get('date', now.strftime('%Y-%m-%d'))
+        # date.fromisoformat is the fast path; strptime only for unpadded dates like 2025-3-4
         try:
-            news_date = datetime.datetime.strptime(date_str, '%Y-%m-%d').replace(tzinfo=datetime.timezone.utc)
-        except:
-            news_date = now
+            d = datetime.date.fromisoformat(date_str)
+        except ValueError:
+            d = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
+        news_date = datetime.datetime(d.year, d.month, d.day, tzinfo=datetime.timezone.utc)
+    except:
+        news_date = now
 
-        if news_date > now:
-            news_date = now
+    if news_date > now:
+        news_date = now
 
-        news_date_str = news_date.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+    news_date_str = news_date.strftime('%Y-%m-%dT%H:%M:%S.000Z')
 
-        # Dynamic cutoff: honour --days argument so a "420 day" run keeps 2024 articles.
-        # Industrial sales cycles are 12-24 months so we never cut off more aggressively
-        # than 18 months even when no explicit --days is given.
-        if days_back and days_back > 0:
-            cutoff = now - datetime.timedelta(days=days_back)
-        else:
-            cutoff = now - datetime.timedelta(days=548)  # 18-month default
-
-        if news_date < cutoff:
-            # Special case: Gemini sometimes returns a clearly bogus date (year < 2023)
-            # because the grounding date extraction failed.  Re-anchor those to today
-            # rather than discarding potentially valid niche content.
-            if news_item.get('_search_region') == 'gemini_search' and news_date.year < 2023:
-                news_date = now
-                news_date_str = news_date.strftime('%Y-%m-%dT%H:%M:%S.000Z')
-            else:
-                # Cutoff applies to every article — Gemini included.
-                conn.close()
-                print(f" [Skip: older than {cutoff.strftime('%Y-%m-%d')} ({news_date.strftime('%Y-%m-%d')})]", end="")
-                return False, "too_old"
-        
-        details = news_item.get('details', {})
-        if isinstance(details, dict):
-            clean_details = {
-                'location': sanitize_text(details.get('location', '')),
-                'financial_value': sanitize_text(details.get('financial_value', '')),
-                'partners': [sanitize_text(p) for p in (details.get('partners') or [])],
-                'products': [sanitize_text(p) for p in (details.get('products') or [])]
-            }
+    # Dynamic cutoff: honour --days argument so a "420 day" run keeps 2024 articles.
+    # Industrial sales cycles are 12-24 months so we never cut off more aggressively
+    # than 18 months even when no explicit --days is given.
+    if days_back and days_back > 0:
+        cutoff = now - datetime.timedelta(days=days_back)
+    else:
+        cutoff = now - datetime.timedelta(days=548)  # 18-month default
+
+    if news_date < cutoff:
+        # Special case: Gemini sometimes returns a clearly bogus date (year < 2023)
+        # because the grounding date extraction failed.  Re-anchor those to today
+        # rather than discarding potentially valid niche content.
+        if news_item.get('_search_region') == 'gemini_search' and news_date.year < 2023:
+            news_date = now
+            news_date_str = news_date.strftime('%Y-%m-%dT%H:%M:%S.000Z')
         else:
-            clean_details = {}
-        category = news_item.get('category', '')
-        if category:
-            clean_details['category'] = sanitize_text(category)
-        details_json = json.dumps(clean_details)
-        
-        cursor.execute("""
-            INSERT INTO "CompetitorNews" (
-                id, "competitorId", "eventType", date, title, summary,
-                "threatLevel", details, "sourceUrl", "isRead", "isStarred", "extractedAt", region
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            news_id, competitor_id, event_type, news_date_str, title, summary,
-            threat_level, details_json, source_url, False, False, iso_now_str, region
-        ))
-        
-        conn.commit()
-        conn.close()
-        return True, "saved"
-        
+            # Cutoff applies to every article — Gemini included.
+            print(f" [Skip: older than {cutoff.strftime('%Y-%m-%d')} ({news_date.strftime('%Y-%m-%d')})]", end="")
+            return None, "too_old"
+    
+    details = news_item.get('details', {})
+    if details and isinstance(details, dict):
+        clean_details = {
+            'location': sanitize_text(details.get('location', '')),
+            'financial_value': sanitize_text(details.get('financial_value', '')),
+            'partners': [sanitize_text(p) for p in (details.get('partners') or [])],
+            'products': [sanitize_text(p) for p in (details.get('products') or [])]
+        }
+    else:
+        clean_details = {}
+    category = news_item.get('category', '')
+    if category:
+        clean_details['category'] = sanitize_text(category)
+    # details is NOT NULL in the schema, so an empty dict is stored as the literal '{}'
+    details_json = orjson.dumps(clean_details).decode() if clean_details else '{}'
+
+    return (
+        news_id, competitor_id, event_type, news_date_str, title, summary,
+        threat_level, details_json, source_url, False, False, iso_now_str, region
+    ), None
+
+
+def save_news_items(competitor_id, news_items, days_back=None):
+    """Save a batch of news items for one competitor.
+    Uses one connection, one duplicate lookup and one multi-row INSERT.
+    Returns a (success, status) tuple per item, in order.
+    """
+    statuses = [None] * len(news_items)
+
+    candidates = []
+    for i, news_item in enumerate(news_items):
+        source_url = sanitize_text(news_item.get('source_url', ''))
+        if not source_url or 'example.com' in source_url:
+            statuses[i] = (False, "invalid_url")
+            continue
+        title = sanitize_text(news_item.get('title', 'Untitled'))[:200]
+        candidates.append((i, source_url, title))
+
+    if not candidates:
+        return statuses
+
+    conn = None
+    inserted = []
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        known_urls, known_titles = prefilter_duplicates(
+            cursor, competitor_id, [c[1] for c in candidates], [c[2] for c in candidates]
+        )
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        rows = []
+        for i, source_url, title in candidates:
+            if source_url in known_urls:
+                statuses[i] = (False, "duplicate_url")
+                continue
+            if title in known_titles:
+                statuses[i] = (False, "duplicate_title")
+                continue
+            try:
+                row, reason = _prepare_news_row(competitor_id, news_items[i], source_url, title, days_back, now)
+            except Exception as e:
+                statuses[i] = (False, str(e))
+                continue
+            if row is None:
+                statuses[i] = (False, reason)
+                continue
+            # Later items in the same batch dedupe against this one too
+            known_urls.add(source_url)
+            known_titles.add(title)
+            rows.append(row)
+            inserted.append((i, source_url))
+
+        if rows:
+            # ON CONFLICT covers a URL saved concurrently since the prefilter ran
+            returned = execute_values(cursor, """
+                INSERT INTO "CompetitorNews" (
+                    id, "competitorId", "eventType", date, title, summary,
+                    "threatLevel", details, "sourceUrl", "isRead", "isStarred", "extractedAt", region
+                ) VALUES %s
+                ON CONFLICT ("sourceUrl") DO NOTHING
+                RETURNING "sourceUrl"
+            """, rows, fetch=True)
+            conn.commit()
+            saved_urls = {row['sourceUrl'] for row in returned}
+            for i, source_url in inserted:
+                statuses[i] = (True, "saved") if source_url in saved_urls else (False, "duplicate_url")
+
     except Exception as e:
-        conn.close()
-        return False, str(e)
+        if conn is not None:
+            conn.rollback()
+        # Everything not yet decided failed with the batch, including items never reached
+        for i, status in enumerate(statuses):
+            if status is None:
+                statuses[i] = (False, str(e))
+    finally:
+        if conn is not None:
+            release_db_connection(conn)
+
+    return statuses
+
+
+def save_news_item(competitor_id, news_item, days_back=None):
+    """Save news item to database"""
+    return save_news_items(competitor_id, [news_item], days_back)[0]
 
 
 def get_last_fetch_date():
     """Get the date of the most recent news item in the DB"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT MAX("extractedAt") as last_fetch FROM "CompetitorNews"')
-        result = cursor.fetchone()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT MAX("extractedAt") as last_fetch FROM "CompetitorNews"')
+            result = cursor.fetchone()
         if result and result['last_fetch']:
             return result['last_fetch']
     except:
@@ -778,18 +1043,32 @@ def get_last_fetch_date():
     return None
 
 
-def get_all_existing_urls():
-    """Fetch all existing source URLs from DB"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT "sourceUrl" FROM "CompetitorNews"')
-    urls = {row['sourceUrl'] for row in cursor.fetchall()}
-    conn.close()
-    return urls
+def filter_known_urls(urls):
+    """Return the subset of urls already stored (unique-index lookup on just these URLs)"""
+    if not urls:
+        return set()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT "sourceUrl" FROM "CompetitorNews" WHERE "sourceUrl" = ANY(%s)', (list(urls),))
+        return {row['sourceUrl'] for row in cursor.fetchall()}
+
+
+def clear_all_news():
+    """Delete every news item (clean start)"""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('TRUNCATE TABLE "CompetitorNews"')
+        conn.commit()
+
+
+# 'running' updates closer together than this are coalesced; other states always write
+STATUS_MIN_INTERVAL = 0.5
+_last_status_write = 0.0
 
 
 def write_status(status, current_competitor=None, processed=0, total=0, error=None):
     """Write progress status to JSON file for Next.js API to read"""
+    global _last_status_write
     percent_complete = int((processed / total) * 100) if total > 0 else 0
     estimated_seconds_remaining = (total - processed) * 20  # ~20s per competitor (async is faster)
 
@@ -805,22 +1084,27 @@ def write_status(status, current_competitor=None, processed=0, total=0, error=No
         'error': error
     }
 
+    now = time.monotonic()
+    if status == 'running' and processed not in (0, total) and now - _last_status_write < STATUS_MIN_INTERVAL:
+        return status_data
+    _last_status_write = now
+
     status_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'public', 'refresh_status.json')
     os.makedirs(os.path.dirname(status_path), exist_ok=True)
 
-    with open(status_path, 'w') as f:
-        json.dump(status_data, f, indent=2)
-        f.flush()
+    # Write-then-rename so the Next.js reader never sees a half-written file
+    tmp_path = status_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(status_data, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_path, status_path)
 
     return status_data
 
 
-async def gather_all_articles(competitor, days_back, regions):
+async def gather_all_articles(competitor, days_back, regions, native_region=None):
     """Run Serper + Gemini in parallel."""
     name = competitor['name']
-    headquarters = competitor.get('headquarters') or ''
     website = competitor.get('website') or ''
-    native_region = get_native_region(headquarters)
 
     serper_task = search_news_async(name, regions, days_back=days_back, native_region=native_region)
     gemini_task = search_gemini_async(name, days_back=days_back or 7)
@@ -847,19 +1131,10 @@ async def gather_all_articles(competitor, days_back, regions):
         print(f"      [Gemini-deep error] {deep_results}")
         deep_results = []
 
-    # Merge deep results — use .get() so a missing 'link' key never crashes the batch
-    if deep_results:
-        try:
-            deep_urls = {a.get('link', '') for a in gemini_results}
-            for a in deep_results:
-                if a.get('link', '') and a.get('link') not in deep_urls:
-                    gemini_results.append(a)
-        except Exception as e:
-            print(f"      [deep merge error] {e}")
-
+    # One dedupe pass over all sources — use .get() so a missing 'link' key never crashes the batch
     seen = set()
     merged = []
-    for a in serper_results + gemini_results:
+    for a in itertools.chain(serper_results, gemini_results, deep_results):
         url = a.get('link', '')
         if url and url not in seen:
             seen.add(url)
@@ -867,93 +1142,122 @@ async def gather_all_articles(competitor, days_back, regions):
     return merged
 
 
-async def analyze_with_claude_async(competitor_name, articles, days_back=None):
-    """Async Claude analysis."""
-    if not articles or not ANTHROPIC_API_KEY:
-        return None
+_JSON_DECODER = json.JSONDecoder()
+_FENCE_JSON = "```json"
+_FENCE = "```"
 
-    BATCH_SIZE = 12
-    all_news_items = []
-    async_client = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY)
-
-    for batch_start in range(0, len(articles), BATCH_SIZE):
-        batch = articles[batch_start:batch_start + BATCH_SIZE]
-        batch_num = (batch_start // BATCH_SIZE) + 1
-        total_batches = (len(articles) + BATCH_SIZE - 1) // BATCH_SIZE
-
-        if total_batches > 1:
-             print(f"      [batch {batch_num}/{total_batches}]", end="")
-
-        articles_text = ""
-        for i, article in enumerate(batch, 1):
-            title = sanitize_text(article.get('title', 'No title'))
-            snippet = sanitize_text(article.get('snippet', article.get('description', '')))
-            url = article.get('link', article.get('url', ''))
-            date = article.get('date', 'Unknown')
-            region = article.get('_search_region', 'global').upper()
-            articles_text += f"\n---\nArticle {i}:\nTitle: {title}\nPublished Date: {date}\nURL: {url}\nRegion Found: {region}\nContent: {snippet[:500]}\n---\n"
-
-        today_str = datetime.datetime.now().strftime('%Y-%m-%d')
-        date_instr = ""
-        if days_back:
-            cutoff = datetime.datetime.now() - datetime.timedelta(days=days_back)
-            date_instr = f"CRITICAL: IGNORE any news events that occurred before {cutoff.strftime('%Y-%m-%d')}. Only include news from the last {days_back} days."
-
-        prompt = ANALYSIS_PROMPT.format(
-            competitor_name=competitor_name,
-            articles=articles_text,
-            today_date=today_str,
-            date_instruction=date_instr
-        )
 
-        for attempt in range(3):
-            try:
+def _strip_code_fence(text):
+    """Return the body of the first ```json (or bare ```) fence in text, or text if unfenced."""
+    start = text.find(_FENCE_JSON)
+    if start != -1:
+        start += len(_FENCE_JSON)
+    else:
+        start = text.find(_FENCE)
+        if start == -1:
+            return text.strip()
+        start += len(_FENCE)
+    end = text.find(_FENCE, start)
+    return (text[start:] if end == -1 else text[start:end]).strip()
+
+
+def _extract_first_json_object(text):
+    """Parse the first complete JSON object embedded in text (e.g. after prose), or None.
+    raw_decode stops at the object's closing brace, so trailing text is never scanned.
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+    try:
+        result, _ = _JSON_DECODER.raw_decode(text, start)
+    except json.JSONDecodeError:
+        return None
+    return result
+
+
+async def _analyze_batch_with_claude(async_client, prompt_head, prompt_tail, batch, batch_num, total_batches):
+    """Run one Claude call over a batch of articles and return its news items."""
+    if total_batches > 1:
+         print(f"      [batch {batch_num}/{total_batches}]", end="")
+
+    parts = [prompt_head]
+    append = parts.append
+    for i, article in enumerate(batch, 1):
+        title = sanitize_text(article.get('title', 'No title'))
+        snippet = sanitize_text(article.get('snippet', article.get('description', '')))
+        url = article.get('link', article.get('url', ''))
+        date = article.get('date', 'Unknown')
+        region = article.get('_search_region', 'global').upper()
+        append(f"\n---\nArticle {i}:\nTitle: {title}\nPublished Date: {date}\nURL: {url}\nRegion Found: {region}\nContent: {snippet[:500]}\n---\n")
+    append(prompt_tail)
+    prompt = "".join(parts)
+
+    for attempt in range(3):
+        try:
+            async with _CLAUDE_CONCURRENCY:
                 message = await async_client.messages.create(
                     model="claude-haiku-4-5-20251001",
                     max_tokens=8000,
                     messages=[{"role": "user", "content": prompt}]
                 )
-                response_text = message.content[0].text.strip()
-
-                if "```json" in response_text:
-                    response_text = response_text.split("```json")[1].split("```")[0]
-                elif "```" in response_text:
-                    response_text = response_text.split("```")[1].split("```")[0]
-                response_text = response_text.strip()
-
-                result = None
-                try:
-                    result = json.loads(response_text)
-                except json.JSONDecodeError:
-                    m = re.search(r'\{[\s\S]*\}', response_text)
-                    if m:
-                        try:
-                            result = json.loads(m.group())
-                        except: pass
-
-                if result is None:
-                    if attempt < 2: continue
-                    break
-
-                if not result.get('no_relevant_news'):
-                    items = result.get('news_items', [])
-                    url_map = {a.get('link', ''): a.get('_search_region') for a in batch}
-                    for item in items:
-                        src = item.get('source_url', '')
-                        if src in url_map:
-                            item['_search_region'] = url_map[src]
-                    all_news_items.extend(items)
+            response_text = _strip_code_fence(message.content[0].text)
+
+            result = None
+            try:
+                result = orjson.loads(response_text)
+            except orjson.JSONDecodeError:
+                result = _extract_first_json_object(response_text)
+
+            if result is None:
+                if attempt < 2: continue
                 break
 
-            except Exception:
-                if attempt < 2: await asyncio.sleep(1)
+            if result.get('no_relevant_news'):
+                return []
+            items = result.get('news_items', [])
+            url_map = {a.get('link', ''): a.get('_search_region') for a in batch}
+            for item in items:
+                src = item.get('source_url', '')
+                if src in url_map:
+                    item['_search_region'] = url_map[src]
+            return items
+
+        except Exception:
+            if attempt < 2: await asyncio.sleep(1)
+
+    return []
 
-        if batch_start + BATCH_SIZE < len(articles):
-            await asyncio.sleep(0.5)
+
+async def analyze_with_claude_async(competitor_name, articles, days_back=None):
+    """Async Claude analysis — all batches for the competitor run concurrently."""
+    if not articles or not ANTHROPIC_API_KEY:
+        return None
+
+    BATCH_SIZE = 12
+    async_client = get_async_claude()
+
+    today_str = datetime.datetime.now().strftime('%Y-%m-%d')
+    date_instr = ""
+    if days_back:
+        cutoff = datetime.datetime.now() - datetime.timedelta(days=days_back)
+        date_instr = f"CRITICAL: IGNORE any news events that occurred before {cutoff.strftime('%Y-%m-%d')}. Only include news from the last {days_back} days."
+
+    prompt_head = _PROMPT_HEAD.format(competitor_name=competitor_name)
+    prompt_tail = _PROMPT_TAIL.format(today_date=today_str, date_instruction=date_instr)
+
+    batches = [articles[i:i + BATCH_SIZE] for i in range(0, len(articles), BATCH_SIZE)]
+    results = await asyncio.gather(*[
+        _analyze_batch_with_claude(async_client, prompt_head, prompt_tail, batch, batch_num, len(batches))
+        for batch_num, batch in enumerate(batches, 1)
+    ])
+    all_news_items = [item for items in results for item in items]
 
     return {'news_items': all_news_items} if all_news_items else {'no_relevant_news': True}
 
 
+_INDUSTRIAL_RE = re.compile(r'machinery|industrial|manufactur|fabricat|equipment|cnc')
+
+
 async def fetch_news_for_competitor_async(competitor, regions, existing_urls=None, days_back=None):
     """Async fetch for one competitor."""
     name = competitor['name']
@@ -963,8 +1267,7 @@ async def fetch_news_for_competitor_async(competitor, regions, existing_urls=Non
 
     # Industrial/machinery moves stay relevant for 12-18 months — extend the save cutoff
     # regardless of how many days the Serper search window covers.
-    _industrial_keywords = ('machinery', 'industrial', 'manufactur', 'fabricat', 'equipment', 'cnc')
-    if any(k in industry for k in _industrial_keywords):
+    if _INDUSTRIAL_RE.search(industry):
         effective_days_back = max(days_back or 0, 540)  # at least 18 months
     else:
         effective_days_back = days_back
@@ -974,21 +1277,29 @@ async def fetch_news_for_competitor_async(competitor, regions, existing_urls=Non
     else:
         print(f"\n  🔍 {name}", end="")
 
-    articles = await gather_all_articles(competitor, days_back, regions)
+    articles = await gather_all_articles(competitor, days_back, regions, native_region)
 
     if not articles:
         print(" — no articles")
         return 0
 
-    if existing_urls:
-        new_articles = [a for a in articles if a.get('link', '') not in existing_urls]
-        skipped = len(articles) - len(new_articles)
-        if skipped > 0:
-            print(f" — {len(articles)} found, {skipped} known", end="")
-        if not new_articles:
-            print(" — all known, skip")
-            return 0
-        articles = new_articles
+    # Known = saved earlier in this run, or already in the DB (checked for these URLs only)
+    run_urls = existing_urls or set()
+    candidate_urls = {a['link'] for a in articles if a.get('link')} - run_urls
+    async with _DB_SLOTS:
+        known_urls = await asyncio.to_thread(filter_known_urls, candidate_urls)
+
+    new_articles = [
+        a for a in articles
+        if a.get('link', '') not in known_urls and a.get('link', '') not in run_urls
+    ]
+    skipped = len(articles) - len(new_articles)
+    if skipped > 0:
+        print(f" — {len(articles)} found, {skipped} known", end="")
+    if not new_articles:
+        print(" — all known, skip")
+        return 0
+    articles = new_articles
 
     print(f" — {len(articles)} new...", end="")
 
@@ -999,10 +1310,14 @@ async def fetch_news_for_competitor_async(competitor, regions, existing_urls=Non
 
     news_items = analysis.get('news_items', [])
     saved = 0
-    for item in news_items:
-        success, status = await asyncio.to_thread(save_news_item, competitor['id'], item, effective_days_back)
+    async with _DB_SLOTS:
+        results = await asyncio.to_thread(save_news_items, competitor['id'], news_items, effective_days_back)
+    for item, (success, status) in zip(news_items, results):
         if success:
             saved += 1
+            # sourceUrl is unique across competitors — later competitors can skip it before Claude
+            if existing_urls is not None:
+                existing_urls.add(sanitize_text(item.get('source_url', '')))
         else:
             print(f" [Skip: {status}]", end="")
 
@@ -1030,11 +1345,7 @@ async def _fetch_all_news_async_inner(limit=None, clean_start=False, regions=Non
         regions = ['global', 'brazil', 'argentina', 'europe', 'spain', 'us', 'mexico']
 
     if clean_start:
-        conn = get_db_connection()
-        c = conn.cursor()
-        c.execute('DELETE FROM "CompetitorNews"')
-        conn.commit()
-        conn.close()
+        await asyncio.to_thread(clear_all_news)
         print(f"\n🧹 Cleared DB")
 
     # Determine search window
@@ -1059,9 +1370,8 @@ async def _fetch_all_news_async_inner(limit=None, clean_start=False, regions=Non
         print(f"\n📅 Searching last {search_days} day(s)")
 
     print(f"🌍 Regions: {', '.join(regions)}")
-    print("📦 Loading existing URLs...")
-    existing_urls = await asyncio.to_thread(get_all_existing_urls)
-    print(f"   {len(existing_urls)} articles already in DB")
+    # URLs saved during this run; URLs already in the DB are looked up per competitor
+    existing_urls = set()
 
     competitors = await asyncio.to_thread(get_competitors)
 
@@ -1076,31 +1386,30 @@ async def _fetch_all_news_async_inner(limit=None, clean_start=False, regions=Non
 
     write_status('running', current_competitor=None, processed=0, total=total_competitors)
 
-    BATCH_SIZE = 5
+    # Up to this many competitors in flight; a slot is refilled as soon as any finishes.
+    # Serper, Gemini and Claude calls are paced by their own limiters.
+    COMPETITOR_CONCURRENCY = 5
+    slots = asyncio.Semaphore(COMPETITOR_CONCURRENCY)
     total_news = 0
     processed = 0
 
-    try:
-        for batch_start in range(0, total_competitors, BATCH_SIZE):
-            batch = competitors[batch_start:batch_start + BATCH_SIZE]
-
-            for comp in batch:
-                write_status('running', current_competitor=comp['name'], processed=processed, total=total_competitors)
-
-            tasks = [
-                fetch_news_for_competitor_async(c, regions, existing_urls=existing_urls, days_back=search_days)
-                for c in batch
-            ]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            for i, result in enumerate(results):
-                if isinstance(result, int):
-                    total_news += result
-                processed += 1
-                write_status('running', current_competitor=batch[i]['name'], processed=processed, total=total_competitors)
+    async def _run(comp):
+        async with slots:
+            write_status('running', current_competitor=comp['name'], processed=processed, total=total_competitors)
+            try:
+                result = await fetch_news_for_competitor_async(comp, regions, existing_urls=existing_urls, days_back=search_days)
+            except Exception as e:
+                result = e
+            return comp, result
 
-            if batch_start + BATCH_SIZE < total_competitors:
-                await asyncio.sleep(random.uniform(3.0, 5.0))
+    tasks = [asyncio.create_task(_run(c)) for c in competitors]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            comp, result = await next_done
+            if isinstance(result, int):
+                total_news += result
+            processed += 1
+            write_status('running', current_competitor=comp['name'], processed=processed, total=total_competitors)
 
         write_status('completed', processed=total_competitors, total=total_competitors)
         print("\n" + "=" * 60)
@@ -1108,6 +1417,8 @@ async def _fetch_all_news_async_inner(limit=None, clean_start=False, regions=Non
         print("=" * 60)
 
     except Exception as e:
+        for task in tasks:
+            task.cancel()
         print(f"\n\n❌ ERROR: {e}")
         write_status('error', error=str(e), processed=processed, total=total_competitors)
         raise
@@ -1115,9 +1426,18 @@ async def _fetch_all_news_async_inner(limit=None, clean_start=False, regions=Non
     return total_news
 
 
+async def _fetch_all_news_async(limit=None, clean_start=False, regions=None, days=None, competitor_name=None):
+    try:
+        return await _fetch_all_news_async_inner(limit, clean_start, regions, days, competitor_name)
+    finally:
+        await close_http_client()
+        await close_async_claude()
+        close_db_pool()
+
+
 def fetch_all_news(limit=None, clean_start=False, regions=None, days=None, competitor_name=None):
     """Sync wrapper."""
-    return asyncio.run(_fetch_all_news_async_inner(limit, clean_start, regions, days, competitor_name))
+    return asyncio.run(_fetch_all_news_async(limit, clean_start, regions, days, competitor_name))
 
 
 if __name__ == "__main__":
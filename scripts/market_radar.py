@@ -1,32 +1,64 @@
 
+import datetime
+import random
+import secrets
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from duckduckgo_search import DDGS
 from urllib.parse import urlparse
 
 DB_PATH = "prisma/dev.db"
 
+def generate_cuid():
+    return 'c' + secrets.token_hex(12)
+
 def get_domain(url):
     try:
-        return urlparse(url).netloc.replace('www.', '')
+        # Stored websites are often scheme-less (mazemap.com, www.mappedin.com/);
+        # without a leading // urlparse reads them as a path and netloc is empty
+        if '//' not in url:
+            url = '//' + url
+        return urlparse(url).netloc.lower().replace('www.', '')
     except:
         return ""
 
+def add_known_domain(domain, known_domains):
+    """Add domain and its parent domains (shop.x.com adds shop.x.com and x.com)"""
+    labels = domain.split('.')
+    for i in range(len(labels) - 1):
+        known_domains.add('.'.join(labels[i:]))
+
+def is_known_domain(domain, known_domains):
+    """True if domain is known, or is the parent domain of a known website (x.com when shop.x.com is stored)"""
+    return domain in known_domains
+
 def market_radar():
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
-    # Get known domains to exclude
-    cursor.execute("SELECT website FROM Competitor")
-    known_websites = {get_domain(row[0]) for row in cursor.fetchall()}
+    # One pass over Competitor: known domains to exclude, plus the active rows to sample from
+    cursor.execute("SELECT name, industry, website, status FROM Competitor")
+    rows = cursor.fetchall()
+    known_domains = set()
+    for _, _, website, _ in rows:
+        domain = get_domain(website)
+        if domain:
+            add_known_domain(domain, known_domains)
     
     # Get some key players to pivot search around
-    cursor.execute("SELECT name, industry FROM Competitor WHERE status='Active' ORDER BY RANDOM() LIMIT 5")
-    samples = cursor.fetchall()
+    actives = [(name, industry) for name, industry, _, status in rows if status == 'Active']
+    samples = random.sample(actives, min(5, len(actives)))
     
-    ddgs = DDGS()
+    # DDGS keeps per-instance request and rate-limit state and isn't documented as
+    # thread-safe, so each worker thread gets its own instance
+    local = threading.local()
     print("Scanning for new market entrants...")
     
     new_candidates = []
+    # Detected competitors are inserted together in one transaction at the end
+    new_rows = []
+    now_iso = datetime.datetime.now(datetime.timezone.utc).isoformat()
     
     # Blocklist for filtering
     BLOCKLIST = {'porn', 'xxx', 'sex', 'video', 'amateur', 'free', 'streaming', 'casino', 'gambling', 'dating'}
@@ -42,6 +74,7 @@ def market_radar():
         if "mena" in cat: return "Digital Signage MENA"
         return "Digital Wayfinding Solution"
 
+    planned = []
     for name, industry in samples:
         # Get specific sector terms
         sector = get_sector_keywords(industry)
@@ -55,13 +88,23 @@ def market_radar():
         ]
         
         # Pick one query strategy per sample to mix it up
-        import random
         query = random.choice(queries)
         print(f"  Radar Query: {query}")
-        
+        planned.append((sector, query))
+
+    def search(query):
+        if not hasattr(local, 'ddgs'):
+            local.ddgs = DDGS()
+        # IMPORTANT: safesearch="on" to avoid inappropriate content
+        return local.ddgs.text(keywords=query, region="wt-wt", safesearch="on", max_results=10)
+
+    # Searches run concurrently, one DDGS per thread; results are handled in query order
+    with ThreadPoolExecutor(max_workers=max(len(planned), 1)) as ex:
+        futures = [ex.submit(search, query) for _, query in planned]
+
+    for (sector, _), future in zip(planned, futures):
         try:
-            # IMPORTANT: safesearch="on" to avoid inappropriate content
-            results = ddgs.text(keywords=query, region="wt-wt", safesearch="on", max_results=10)
+            results = future.result()
             
             for res in results:
                 url = res.get('href')
@@ -78,26 +121,28 @@ def market_radar():
                     continue
 
                 # Simple heuristic: if domain is not known and not a generic news site
-                if domain not in known_websites:
-                    # Let's verify if not already detected
-                    cursor.execute("SELECT id FROM Competitor WHERE website LIKE ?", (f"%{domain}%",))
-                    if not cursor.fetchone():
-                        print(f"    Possible new competitor: {title} ({domain})")
-                        
-                        now_iso = datetime.datetime.now(datetime.timezone.utc).isoformat()
-                        cursor.execute("""
-                            INSERT INTO Competitor (name, website, status, industry, lastUpdated)
-                            VALUES (?, ?, 'Detected', ?, ?)
-                        """, (title[:50], url, sector, now_iso))
-                        
-                        known_websites.add(domain)
-                        new_candidates.append(title)
+                if not is_known_domain(domain, known_domains):
+                    print(f"    Possible new competitor: {title} ({domain})")
+                    new_rows.append((generate_cuid(), title[:50], url, sector, now_iso))
+                    
+                    add_known_domain(domain, known_domains)
+                    new_candidates.append(title)
                         
         except Exception as e:
             print(f"    Error: {e}")
 
-    conn.commit()
-    conn.close()
+    try:
+        if new_rows:
+            # OR IGNORE skips a candidate whose name collides with an existing competitor
+            cursor.executemany("""
+                INSERT OR IGNORE INTO Competitor (id, name, website, status, industry, updatedAt)
+                VALUES (?, ?, ?, 'Detected', ?, ?)
+            """, new_rows)
+        conn.commit()
+    except Exception as e:
+        print(f"    Error saving candidates: {e}")
+    finally:
+        conn.close()
     if new_candidates:
         print(f"Radar detection complete. Found {len(new_candidates)} new candidates.")
     else:
@@ -1,54 +1,63 @@
 import sqlite3
-import json
+import orjson
+import re
 
 DB_PATH = "prisma/dev.db"
+# Updates are applied in chunks of this many rows, all within the one transaction
+UPDATE_BATCH_SIZE = 500
+
+# Region keywords, checked in priority order (a location naming both Dubai and London is MENA)
+REGION_KEYWORDS = [
+    ('MENA', ['uae', 'dubai', 'abu dhabi', 'saudi', 'riyadh', 'qatar', 'doha', 'kuwait', 'bahrain', 'oman', 'egypt', 'cairo', 'morocco', 'jordan', 'middle east', 'mena']),
+    ('Europe', ['uk', 'united kingdom', 'germany', 'france', 'spain', 'italy', 'netherlands', 'sweden', 'norway', 'denmark', 'finland', 'berlin', 'london', 'paris', 'amsterdam', 'switzerland', 'poland', 'europe', 'austria', 'brussels']),
+    ('North America', ['usa', 'united states', 'canada', 'mexico', 'san diego', 'new york', 'toronto', 'los angeles', 'chicago', 'atlanta', 'austin', 'boston', 'vancouver']),
+    ('APAC', ['china', 'japan', 'korea', 'singapore', 'hong kong', 'india', 'australia', 'sydney', 'melbourne', 'tokyo', 'shanghai', 'mumbai', 'asia', 'pacific']),
+    ('South America', ['brazil', 'argentina', 'chile', 'peru', 'colombia', 'sao paulo']),
+]
+
+# One alternation over every keyword, in region priority order. The lookahead makes findall
+# report a keyword at every position (overlaps included), so the highest-priority region wins
+# no matter where in the location it appears.
+_REGION_RE = re.compile('(?=(' + '|'.join(
+    re.escape(k) for _, keywords in REGION_KEYWORDS for k in keywords
+) + '))')
+_KEYWORD_RANK = {
+    k: rank for rank, (_, keywords) in enumerate(REGION_KEYWORDS) for k in keywords
+}
 
 def get_region_from_location(location):
     if not location:
         return 'Global'
     
-    loc = location.lower()
-    
-    # MENA
-    if any(x in loc for x in ['uae', 'dubai', 'abu dhabi', 'saudi', 'riyadh', 'qatar', 'doha', 'kuwait', 'bahrain', 'oman', 'egypt', 'cairo', 'morocco', 'jordan', 'middle east', 'mena']):
-        return 'MENA'
-    
-    # Europe
-    if any(x in loc for x in ['uk', 'united kingdom', 'germany', 'france', 'spain', 'italy', 'netherlands', 'sweden', 'norway', 'denmark', 'finland', 'berlin', 'london', 'paris', 'amsterdam', 'switzerland', 'poland', 'europe', 'austria', 'brussels']):
-        return 'Europe'
-        
-    # North America
-    if any(x in loc for x in ['usa', 'united states', 'canada', 'mexico', 'san diego', 'new york', 'toronto', 'los angeles', 'chicago', 'atlanta', 'austin', 'boston', 'vancouver']):
-        return 'North America'
-        
-    # APAC
-    if any(x in loc for x in ['china', 'japan', 'korea', 'singapore', 'hong kong', 'india', 'australia', 'sydney', 'melbourne', 'tokyo', 'shanghai', 'mumbai', 'asia', 'pacific']):
-        return 'APAC'
-        
-    # South America
-    if any(x in loc for x in ['brazil', 'argentina', 'chile', 'peru', 'colombia', 'sao paulo']):
-        return 'South America'
-        
-    return 'Global'
+    matches = _REGION_RE.findall(location.lower())
+    if not matches:
+        return 'Global'
+    return REGION_KEYWORDS[min(_KEYWORD_RANK[k] for k in matches)][0]
+
+def flush_updates(cursor, updates):
+    """Apply pending (region, id) updates in one executemany and clear the buffer"""
+    if not updates:
+        return 0
+    cursor.executemany("UPDATE CompetitorNews SET region = ? WHERE id = ?", updates)
+    count = len(updates)
+    updates.clear()
+    return count
 
 def migrate():
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
-    # Get all news
-    cursor.execute("SELECT id, details, region FROM CompetitorNews")
+    # Only rows still missing a region
+    cursor.execute("SELECT id, details FROM CompetitorNews WHERE region IS NULL OR region = ''")
     rows = cursor.fetchall()
     
     updated = 0
+    updates = []
     
     for row in rows:
         try:
-            current_region = row['region']
-            if current_region:
-                continue
-
-            details = json.loads(row['details'])
+            details = orjson.loads(row['details'])
             loc = details.get('location', '')
             
             # Check for primary_region in details first
@@ -57,13 +66,14 @@ def migrate():
             if not new_region:
                 new_region = get_region_from_location(loc)
             
-            cursor.execute("UPDATE CompetitorNews SET region = ? WHERE id = ?", (new_region, row['id']))
-            updated += 1
-            print(f"Updated {row['id']}: {loc} -> {new_region}")
+            updates.append((new_region, row['id']))
+            if len(updates) >= UPDATE_BATCH_SIZE:
+                updated += flush_updates(cursor, updates)
             
         except Exception as e:
             print(f"Error row {row['id']}: {e}")
-            
+    
+    updated += flush_updates(cursor, updates)
     conn.commit()
     conn.close()
     print(f"Migration complete. Updated {updated} records.")
@@ -3,15 +3,22 @@ News Fetcher for CIMHSA Competitor Intelligence
 Uses Serper.dev (Google Search API) + Claude AI (Anthropic) for analysis
 """
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
+import atexit
 import datetime
+import hashlib
 import json
+import orjson
 import os
 import time
-import uuid
+import secrets
 import re
-import requests
+import sqlite3
+import threading
+from contextlib import contextmanager
+import httpx
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import anthropic
 from dotenv import load_dotenv
 
@@ -28,11 +35,84 @@ DATABASE_URL = _raw_db_url.split('?')[0] if _raw_db_url else None  # Remove quer
 
 # Initialize Anthropic client
 client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+# Same analysis model as fetch_feeds.py
+CLAUDE_MODEL = "claude-haiku-4-5-20251001"
+
+# Competitors are processed by a small worker pool; API pressure is bounded per service
+COMPETITOR_WORKERS = 4
+SERPER_WORKERS = 8  # Per competitor
+
+# Shared HTTP/2 Serper client: one multiplexed keep-alive connection set for every
+# query and worker thread (httpx.Client is thread-safe)
+SERPER_CLIENT = httpx.Client(
+    transport=httpx.HTTPTransport(
+        http2=True, retries=3,
+        limits=httpx.Limits(max_connections=COMPETITOR_WORKERS * SERPER_WORKERS),
+    ),
+    headers={"X-API-KEY": SERPER_API_KEY or "", "Content-Type": "application/json"},
+    timeout=30.0,
+)
+
+CLAUDE_SEM = threading.Semaphore(3)  # Concurrent Claude calls across all workers
+
+
+class _RateLimiter:
+    """Thread-safe token bucket: at most `rate` calls per second, bursting up to `rate`."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+SERPER_QPS = int(os.getenv("SERPER_QPS", "5"))
+_SERPER_LIMITER = _RateLimiter(SERPER_QPS)
+
+# Local Serper response cache: reruns within a few hours reuse results instead of paying again
+CACHE_DB_PATH = os.path.join(os.path.dirname(__file__), 'cache', 'news_fetcher_cache.db')
+SERPER_CACHE_TTL = 6 * 3600  # 6 hours in seconds
+_cache_db = None
+_cache_lock = threading.Lock()
+
+# Each worker borrows a pooled connection only for the duration of a query
+DB_POOL_SIZE = COMPETITOR_WORKERS + 1
+_pg_pool = None
+_pg_pool_lock = threading.Lock()
+# Progress file in the public directory, read by the Next.js API
+STATUS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'public', 'refresh_status.json')
+_status_lock = threading.Lock()
+_last_status_bytes = None  # Last payload written by write_status
+# 'running' updates closer together than this are coalesced; other states always write
+STATUS_MIN_INTERVAL = 1.0
+_last_status_write = 0.0
 
 # Priority competitors (most likely to have news)
 PRIORITY_COMPETITORS = [
     "Indústrias Romi", "Fagor Automation", "Eurostec", "Alletech Máquinas"
 ]
+_PRIORITY_RANK = {name: i for i, name in enumerate(PRIORITY_COMPETITORS)}
+
+# News before this date is skipped (checked on search results and again before saving)
+NEWS_CUTOFF = datetime.date(2024, 1, 1)
+
+# Articles kept per competitor, and the most one Serper query can return
+MAX_ARTICLES = 25
+RESULTS_PER_QUERY = 10
+# Searching stops early once this many not-yet-stored articles are found
+NEW_ARTICLES_TARGET = 10
 
 # Regional search configurations
 REGIONS = {
@@ -56,24 +136,39 @@ BLOCKED_URL_PATTERNS = [
     'wikipedia.org', 'dnb.com', 'zoominfo.com',
     '/careers', '/vagas', '/empleo',
 ]
+# One C-level scan per URL instead of a Python loop over every pattern
+_BLOCKED_URL_RE = re.compile('|'.join(re.escape(p) for p in BLOCKED_URL_PATTERNS))
 
 
 def is_news_url(url):
     """Filter out product pages, sales sites, social media, and company profiles"""
-    if not url:
+    if not url or not url.startswith('http') or 'example.com' in url:
         return False
-    url_lower = url.lower()
-    for pattern in BLOCKED_URL_PATTERNS:
-        if pattern in url_lower:
-            return False
-    return True
+    return not _BLOCKED_URL_RE.search(url.lower())
+
+
+# Serper dates are relative ("3 days ago", "2 years ago") or absolute ("Jan 5, 2023", "5 de jan. de 2023")
+_RELATIVE_YEARS_RE = re.compile(r'(\d+)\s+years?\s+ago')
+_YEAR_RE = re.compile(r'\b(?:19|20)\d{2}\b')
+
 
+def predates_cutoff(serper_date, today=None):
+    """True when a Serper result date is clearly before NEWS_CUTOFF; unknown dates are kept"""
+    if not serper_date:
+        return False
+    today = today or datetime.date.today()
+    m = _RELATIVE_YEARS_RE.search(serper_date)
+    if m:
+        return today.year - int(m.group(1)) < NEWS_CUTOFF.year
+    m = _YEAR_RE.search(serper_date)
+    return bool(m) and int(m.group()) < NEWS_CUTOFF.year
 
-ANALYSIS_PROMPT = """You are a competitive intelligence analyst for CIMHSA, a company that manufactures and sells CNC machine tools, industrial machinery, and automation solutions.
 
-I found these search results about {competitor_name}:
+# Static instructions go in the system prompt, marked cacheable, so repeat calls can
+# reuse them; only the competitor name and articles change per request.
+SYSTEM_PROMPT = """You are a competitive intelligence analyst for CIMHSA, a company that manufactures and sells CNC machine tools, industrial machinery, and automation solutions.
 
-{articles}
+You will be given search results about one competitor.
 
 IMPORTANT: Articles may be in Portuguese, Spanish, or English. Analyze ALL articles regardless of language. Always output your title and summary in ENGLISH, even if the source article is in another language.
 
@@ -98,13 +193,13 @@ STRICTLY EXCLUDE (these are NOT news):
 - Price lists or quotation pages
 - Old press releases just being re-indexed
 
-If NONE of the articles contain real news events, respond with: {{"no_relevant_news": true}}
+Record your findings with the record_news tool. If NONE of the articles contain real news events, call it with an empty news_items list.
 
-Otherwise, return JSON:
+Each news item has these fields:
 
-{{
+{
   "news_items": [
-    {{
+    {
       "event_type": "New Project/Installation" | "Investment/Funding Round" | "Award/Recognition" | "Product Launch" | "Partnership/Acquisition" | "Leadership Change" | "Market Expansion" | "Technical Innovation" | "Financial Performance",
       "title": "Clear headline in ENGLISH (max 100 chars)",
       "summary": "2-3 sentence summary in ENGLISH (max 500 chars). Must describe a specific event, not a general company description.",
@@ -112,15 +207,15 @@ Otherwise, return JSON:
       "date": "YYYY-MM-DD",
       "source_url": "The actual URL from the article",
       "region": "NORTH_AMERICA" | "EUROPE" | "SOUTH_AMERICA" | "APAC" | "GLOBAL",
-      "details": {{
+      "details": {
         "location": "City, Country or null",
         "financial_value": "Amount or null",
         "partners": ["Companies"],
         "products": ["Products"]
-      }}
-    }}
+      }
+    }
   ]
-}}
+}
 
 Threat Level Guide:
 - 1: Routine news, minimal impact
@@ -135,41 +230,120 @@ DATE EXTRACTION INSTRUCTIONS:
 - Use the EXACT "Published Date" provided in the article metadata.
 - Do NOT use today's date unless the article explicitly says "today".
 - If the date is "October 28, 2024", the output date must be "2024-10-28".
-- If no date is found, use the current date as fallback.
+- If no date is found, use the current date as fallback."""
+
+ARTICLES_PROMPT = """I found these search results about {competitor_name}:
+
+{articles}"""
+
+# Forced tool call: the API hands back news_items as already-parsed JSON arguments,
+# so there are no markdown fences to strip or truncated strings to repair
+_NULLABLE_STRING = {"type": ["string", "null"]}
+NEWS_TOOL = {
+    "name": "record_news",
+    "description": "Record the real news events found in the search results.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "news_items": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "event_type": {"type": "string", "enum": [
+                            "New Project/Installation", "Investment/Funding Round", "Award/Recognition",
+                            "Product Launch", "Partnership/Acquisition", "Leadership Change",
+                            "Market Expansion", "Technical Innovation", "Financial Performance",
+                        ]},
+                        "title": {"type": "string"},
+                        "summary": {"type": "string"},
+                        "threat_level": {"type": "integer", "minimum": 1, "maximum": 5},
+                        "date": {"type": "string", "description": "YYYY-MM-DD"},
+                        "source_url": {"type": "string"},
+                        "region": {"type": "string", "enum": [
+                            "NORTH_AMERICA", "EUROPE", "SOUTH_AMERICA", "APAC", "GLOBAL",
+                        ]},
+                        "details": {
+                            "type": "object",
+                            "properties": {
+                                "location": _NULLABLE_STRING,
+                                "financial_value": _NULLABLE_STRING,
+                                "partners": {"type": "array", "items": {"type": "string"}},
+                                "products": {"type": "array", "items": {"type": "string"}},
+                            },
+                        },
+                    },
+                    "required": ["event_type", "title", "summary", "threat_level", "date", "source_url", "region"],
+                },
+            },
+        },
+        "required": ["news_items"],
+    },
+}
+
 
-Return ONLY valid JSON, no markdown formatting or explanation."""
+# One translate() pass: drop control characters and map typographic punctuation to ASCII.
+# Accented letters are kept ("Indústrias Romi", "São Paulo"); Postgres stores UTF-8 natively.
+_SANITIZE_TABLE = str.maketrans({
+    **{cp: None for cp in [*range(0x00, 0x09), 0x0b, 0x0c, *range(0x0e, 0x20), *range(0x7f, 0xa0)]},
+    '\u2018': "'", '\u2019': "'",
+    '\u201c': '"', '\u201d': '"',
+    '\u2013': '-', '\u2014': '-',
+    '\u2026': '...',
+    '\u00a0': ' ',
+})
 
 
 def sanitize_text(text):
-    """Remove problematic characters"""
+    """Remove control characters and normalize typographic punctuation"""
     if not text:
         return ""
-    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', str(text))
-    replacements = {
-        '\u2018': "'", '\u2019': "'",
-        '\u201c': '"', '\u201d': '"',
-        '\u2013': '-', '\u2014': '-',
-        '\u2026': '...',
-        '\u00a0': ' ',
-    }
-    for old, new in replacements.items():
-        text = text.replace(old, new)
-    text = text.encode('ascii', 'ignore').decode('ascii')
-    return text.strip()
+    return str(text).translate(_SANITIZE_TABLE).strip()
 
 
 def generate_cuid():
-    return 'c' + uuid.uuid4().hex[:24]
+    return 'c' + secrets.token_hex(12)
 
 
 def get_db_connection():
-    return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+    """Borrow a connection from the pool; hand it back with release_db_connection()."""
+    global _pg_pool
+    with _pg_pool_lock:
+        if _pg_pool is None:
+            _pg_pool = ThreadedConnectionPool(1, DB_POOL_SIZE, DATABASE_URL, cursor_factory=RealDictCursor)
+    return _pg_pool.getconn()
+
+
+def release_db_connection(conn):
+    _pg_pool.putconn(conn)
+
+
+def close_db_pool():
+    global _pg_pool
+    with _pg_pool_lock:
+        if _pg_pool is not None:
+            _pg_pool.closeall()
+            _pg_pool = None
 
 
-def get_competitors():
-    """Fetch competitors from database"""
+atexit.register(close_db_pool)
+
+
+@contextmanager
+def db_connection():
+    """Borrow a pooled connection for a with-block; it is returned even if the block raises."""
     conn = get_db_connection()
-    cursor = conn.cursor()
+    try:
+        yield conn
+    finally:
+        release_db_connection(conn)
+
+
+def get_competitors(cursor=None):
+    """Fetch competitors from database (pass cursor to reuse a connection)"""
+    if cursor is None:
+        with db_connection() as conn:
+            return get_competitors(conn.cursor())
     
     cursor.execute("""
         SELECT id, name, website, industry, region 
@@ -177,12 +351,12 @@ def get_competitors():
         WHERE status = 'active' OR status IS NULL
     """)
     all_competitors = cursor.fetchall()  # Already dicts thanks to RealDictCursor
-    conn.close()
     
     def sort_key(c):
         name = c['name']
-        if name in PRIORITY_COMPETITORS:
-            return (0, PRIORITY_COMPETITORS.index(name))
+        rank = _PRIORITY_RANK.get(name)
+        if rank is not None:
+            return (0, rank)
         elif 'Direct' in (c.get('industry') or ''):
             return (1, name)
         else:
@@ -191,129 +365,188 @@ def get_competitors():
     return sorted(all_competitors, key=sort_key)
 
 
-def check_existing_url(cursor, url):
-    """Check if URL already exists in database (pass cursor to reuse connection)"""
-    cursor.execute('SELECT id FROM "CompetitorNews" WHERE "sourceUrl" = %s', (url,))
-    return cursor.fetchone() is not None
+def fetch_existing_urls(cursor, urls):
+    """Return which of urls are already in the database, in one query (pass cursor to reuse connection)"""
+    cursor.execute('SELECT "sourceUrl" FROM "CompetitorNews" WHERE "sourceUrl" = ANY(%s)', (list(urls),))
+    return {row['sourceUrl'] for row in cursor.fetchall()}
 
 
-def save_news_item(competitor_id, news_item):
-    """Save news item to database"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    source_url = sanitize_text(news_item.get('source_url', ''))
-    
-    if not source_url or 'example.com' in source_url:
-        conn.close()
-        return False, "invalid_url"
-    
-    if check_existing_url(cursor, source_url):
-        conn.close()
-        return False, "duplicate"
+def _prepare_news_row(competitor_id, news_item, source_url, now):
+    """Validate one news item and build its INSERT row. Returns (row, None) or (None, skip_reason).
+    now is a naive UTC datetime: the columns are TIMESTAMP(3) without time zone, and
+    psycopg2 passes datetimes as typed parameters, so nothing is formatted or reparsed.
+    """
+    news_id = generate_cuid()
+
+    title = sanitize_text(news_item.get('title', 'Untitled'))[:200]
+    summary = sanitize_text(news_item.get('summary', ''))[:1000]
+    event_type = sanitize_text(news_item.get('event_type', 'Unknown'))[:100]
+    region = news_item.get('region', 'GLOBAL')
     
+    threat_level = news_item.get('threat_level', 2)
     try:
-        news_id = generate_cuid()
-        now = datetime.datetime.now(datetime.timezone.utc)
-        
-        # Prepare strictly formatted strings for SQLite/Prisma compatibility
-        iso_now_str = now.strftime('%Y-%m-%dT%H:%M:%S.000Z')
-
-        title = sanitize_text(news_item.get('title', 'Untitled'))[:200]
-        summary = sanitize_text(news_item.get('summary', ''))[:1000]
-        event_type = sanitize_text(news_item.get('event_type', 'Unknown'))[:100]
-        region = news_item.get('region', 'GLOBAL')
-        
-        threat_level = news_item.get('threat_level', 2)
-        try:
-            threat_level = int(threat_level)
-        except:
-            threat_level = 2
-        threat_level = max(1, min(5, threat_level))
-        
-        date_str = news_item.get('date', now.strftime('%Y-%m-%d'))
+        threat_level = int(threat_level)
+    except:
+        threat_level = 2
+    threat_level = max(1, min(5, threat_level))
+    
+    # A missing date means today; unparseable and future dates become now
+    news_timestamp = now
+    date_str = news_item.get('date', now.date().isoformat())
+    if date_str:
         try:
-            news_date = datetime.datetime.strptime(date_str, '%Y-%m-%d').replace(tzinfo=datetime.timezone.utc)
+            # date.fromisoformat is the fast path; strptime only for unpadded dates like 2025-3-4
+            try:
+                news_date = datetime.date.fromisoformat(date_str)
+            except ValueError:
+                news_date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
         except:
-            news_date = now
-
-        # Cap future dates to today
-        if news_date > now:
-            news_date = now
+            news_date = None
+        if news_date is not None and news_date <= now.date():
+            if news_date < NEWS_CUTOFF:
+                return None, "pre_2024"
+            news_timestamp = datetime.datetime(news_date.year, news_date.month, news_date.day)
+    
+    details = news_item.get('details', {})
+    if isinstance(details, dict):
+        clean_details = {
+            'location': sanitize_text(details.get('location', '')),
+            'financial_value': sanitize_text(details.get('financial_value', '')),
+            'partners': [sanitize_text(p) for p in (details.get('partners') or [])],
+            'products': [sanitize_text(p) for p in (details.get('products') or [])]
+        }
+    else:
+        clean_details = {}
+    details_json = json.dumps(clean_details)
+    
+    return (
+        news_id, competitor_id, event_type, news_timestamp, title, summary,
+        threat_level, details_json, source_url, False, False, now, region
+    ), None
 
-        # Skip news before 2024
-        cutoff = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
-        if news_date < cutoff:
-            conn.close()
-            return False, "pre_2024"
 
-        news_date_str = news_date.strftime('%Y-%m-%dT%H:%M:%S.000Z')
-        
-        details = news_item.get('details', {})
-        if isinstance(details, dict):
-            clean_details = {
-                'location': sanitize_text(details.get('location', '')),
-                'financial_value': sanitize_text(details.get('financial_value', '')),
-                'partners': [sanitize_text(p) for p in (details.get('partners') or [])],
-                'products': [sanitize_text(p) for p in (details.get('products') or [])]
-            }
-        else:
-            clean_details = {}
-        details_json = json.dumps(clean_details)
+def save_news_items(conn, competitor_id, news_items, existing_urls=None):
+    """Save one competitor's news items over an open connection with a single multi-row INSERT.
+    Duplicates are left to the unique "sourceUrl" index (ON CONFLICT DO NOTHING).
+    existing_urls is the run's set of saved URLs; it is updated with every URL saved here.
+    Returns a (success, status) tuple per item, in order.
+    """
+    statuses = [None] * len(news_items)
+    cursor = conn.cursor()
+    # One timestamp for the whole batch, stored as UTC wall time
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    known_urls = existing_urls if existing_urls is not None else set()
+    
+    source_urls = [sanitize_text(item.get('source_url', '')) for item in news_items]
+    rows = []
+    pending = []
+    batch_urls = set()
+    for i, (news_item, source_url) in enumerate(zip(news_items, source_urls)):
+        if not source_url or 'example.com' in source_url:
+            statuses[i] = (False, "invalid_url")
+            continue
         
-        cursor.execute("""
-            INSERT INTO "CompetitorNews" (
-                id, "competitorId", "eventType", date, title, summary,
-                "threatLevel", details, "sourceUrl", "isRead", "isStarred", "extractedAt", region
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            news_id,
-            competitor_id,
-            event_type,
-            news_date_str,
-            title,
-            summary,
-            threat_level,
-            details_json,
-            source_url,
-            False,
-            False,
-            iso_now_str,
-            region
-        ))
+        if source_url in batch_urls or source_url in known_urls:
+            statuses[i] = (False, "duplicate")
+            continue
         
-        conn.commit()
-        conn.close()
-        return True, "saved"
+        try:
+            row, reason = _prepare_news_row(competitor_id, news_item, source_url, now)
+        except Exception as e:
+            statuses[i] = (False, str(e))
+            continue
+        if row is None:
+            statuses[i] = (False, reason)
+            continue
         
-    except Exception as e:
-        conn.close()
-        return False, str(e)
+        batch_urls.add(source_url)
+        rows.append(row)
+        pending.append(i)
+    
+    if rows:
+        try:
+            returned = execute_values(cursor, """
+                INSERT INTO "CompetitorNews" (
+                    id, "competitorId", "eventType", date, title, summary,
+                    "threatLevel", details, "sourceUrl", "isRead", "isStarred", "extractedAt", region
+                ) VALUES %s
+                ON CONFLICT ("sourceUrl") DO NOTHING
+                RETURNING "sourceUrl"
+            """, rows, fetch=True)
+            conn.commit()
+            saved_urls = {row['sourceUrl'] for row in returned}
+            for i, source_url in zip(pending, (row[8] for row in rows)):
+                statuses[i] = (True, "saved") if source_url in saved_urls else (False, "duplicate")
+            if existing_urls is not None:
+                existing_urls.update(saved_urls)
+        except Exception as e:
+            conn.rollback()
+            for i in pending:
+                statuses[i] = (False, str(e))
+    
+    return statuses
 
 
-def get_last_fetch_date():
+def get_last_fetch_date(cursor=None):
     """Get the date of the most recent news item in the DB to use as search start date"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        if cursor is None:
+            with db_connection() as conn:
+                return get_last_fetch_date(conn.cursor())
         cursor.execute('SELECT MAX("extractedAt") as last_fetch FROM "CompetitorNews"')
         result = cursor.fetchone()
-        conn.close()
         if result and result['last_fetch']:
             return result['last_fetch']
     except:
+        # Leave a shared connection usable for the caller's next query
+        if cursor is not None:
+            cursor.connection.rollback()
+    return None
+
+
+def _get_cache_db():
+    global _cache_db
+    if _cache_db is None:
+        os.makedirs(os.path.dirname(CACHE_DB_PATH), exist_ok=True)
+        db = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute('CREATE TABLE IF NOT EXISTS serper_cache (key TEXT PRIMARY KEY, cached_at REAL, results BLOB)')
+        db.commit()
+        _cache_db = db
+    return _cache_db
+
+
+def _serper_cache_key(query, search_type, region, num_results, date_restrict):
+    raw = f"{query}|{search_type}|{region}|{num_results}|{date_restrict}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def _cache_get(key):
+    try:
+        with _cache_lock:
+            row = _get_cache_db().execute(
+                'SELECT results FROM serper_cache WHERE key = ? AND cached_at > ?',
+                (key, time.time() - SERPER_CACHE_TTL)
+            ).fetchone()
+        if row:
+            return orjson.loads(row[0])
+    except Exception:
         pass
     return None
 
 
-def get_all_existing_urls():
-    """Fetch all existing source URLs from DB for fast duplicate checking"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT "sourceUrl" FROM "CompetitorNews"')
-    urls = {row['sourceUrl'] for row in cursor.fetchall()}
-    conn.close()
-    return urls
+def _cache_set(key, results):
+    try:
+        with _cache_lock:
+            db = _get_cache_db()
+            db.execute(
+                'INSERT OR REPLACE INTO serper_cache (key, cached_at, results) VALUES (?, ?, ?)',
+                (key, time.time(), orjson.dumps(results))
+            )
+            db.commit()
+    except Exception:
+        pass
 
 
 def search_serper(query, search_type='news', region='global', num_results=10, date_restrict=None):
@@ -326,6 +559,11 @@ def search_serper(query, search_type='news', region='global', num_results=10, da
         print("      ERROR: SERPER_API_KEY not set in .env")
         return []
     
+    cache_key = _serper_cache_key(query, search_type, region, num_results, date_restrict)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
+    
     url = f"https://google.serper.dev/{search_type}"
     
     region_config = REGIONS.get(region, REGIONS['global'])
@@ -341,177 +579,189 @@ def search_serper(query, search_type='news', region='global', num_results=10, da
     if date_restrict:
         payload["tbs"] = f"qdr:{date_restrict}"
     
-    headers = {
-        "X-API-KEY": SERPER_API_KEY,
-        "Content-Type": "application/json"
-    }
-    
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
+        _SERPER_LIMITER.acquire()
+        response = SERPER_CLIENT.post(url, json=payload)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         
         # Extract results based on search type
-        if search_type == 'news':
-            return data.get('news', [])
-        else:
-            return data.get('organic', [])
+        results = data.get('news' if search_type == 'news' else 'organic', [])
+        _cache_set(cache_key, results)
+        return results
             
-    except requests.exceptions.RequestException as e:
+    except (httpx.HTTPError, orjson.JSONDecodeError) as e:
         print(f"      Serper error: {e}")
         return []
 
 
-def search_news(competitor_name, regions_to_search=['global', 'brazil_pt', 'brazil_en', 'europe'], date_restrict=None):
+def search_news(competitor_name, regions_to_search=['global', 'brazil_pt', 'brazil_en', 'europe'], date_restrict=None,
+                known_url_lookup=None, target_new=None):
     """
     Search for news about a competitor across multiple regions and languages.
     Focuses on actual news sources, not product/sales pages.
     date_restrict: e.g. 'd3' for last 3 days, 'w1' for last week
+    known_url_lookup: optional callable returning which of a list of URLs are already stored;
+        with target_new, searching stops once that many not-yet-stored articles are found
     """
     all_results = []
     seen_urls = set()
     filtered_count = 0
+    old_count = 0
+    new_count = 0
+    today = datetime.date.today()
+    
+    def satisfied():
+        return len(all_results) >= MAX_ARTICLES or (target_new is not None and new_count >= target_new)
     
-    # News-focused search queries in English, Portuguese, and Spanish
+    # News-focused search queries in English, Portuguese, and Spanish, tagged by language.
+    # Each region only runs the queries in its own language (its REGIONS 'hl').
     queries = [
         # English — news-focused
-        f'"{competitor_name}" announcement OR launch OR partnership OR expansion OR acquisition',
-        f'"{competitor_name}" revenue OR earnings OR "new contract" OR award',
+        ('en', f'"{competitor_name}" announcement OR launch OR partnership OR expansion OR acquisition'),
+        ('en', f'"{competitor_name}" revenue OR earnings OR "new contract" OR award'),
         # Portuguese — news-focused
-        f'"{competitor_name}" lan\u00e7amento OR parceria OR expans\u00e3o OR aquisi\u00e7\u00e3o OR faturamento',
-        f'"{competitor_name}" not\u00edcia OR feira OR FEIMEC OR Expomafe',
+        ('pt', f'"{competitor_name}" lan\u00e7amento OR parceria OR expans\u00e3o OR aquisi\u00e7\u00e3o OR faturamento'),
+        ('pt', f'"{competitor_name}" not\u00edcia OR feira OR FEIMEC OR Expomafe'),
         # Spanish — news-focused
-        f'"{competitor_name}" lanzamiento OR asociaci\u00f3n OR expansi\u00f3n OR adquisici\u00f3n',
+        ('es', f'"{competitor_name}" lanzamiento OR asociaci\u00f3n OR expansi\u00f3n OR adquisici\u00f3n'),
     ]
     
-    for region in regions_to_search:
-        for query in queries:
-            # Use NEWS search type only — this avoids product pages
-            results = search_serper(query, search_type='news', region=region, num_results=10, date_restrict=date_restrict)
-            
-            for r in results:
-                url = r.get('link', '')
-                if url and url not in seen_urls:
-                    seen_urls.add(url)
-                    if is_news_url(url):
-                        r['_search_region'] = region
-                        all_results.append(r)
-                    else:
-                        filtered_count += 1
+    def run_query(region, query):
+        # Use NEWS search type only — this avoids product pages
+        return search_serper(query, search_type='news', region=region, num_results=RESULTS_PER_QUERY, date_restrict=date_restrict)
+    
+    # A region's queries run concurrently, in waves no larger than the results still needed
+    # could require, so billed calls stop as soon as the cap is reached. Waves are sized from
+    # the cap alone; the new-article target is checked between waves and regions, since
+    # sizing from it would cut every wave to a single query. Results are consumed in query order.
+    with ThreadPoolExecutor(max_workers=SERPER_WORKERS) as ex:
+        for region in regions_to_search:
+            lang = REGIONS.get(region, REGIONS['global'])['hl']
+            remaining = [query for query_lang, query in queries if query_lang == lang]
+            while remaining and not satisfied():
+                wave = -(-(MAX_ARTICLES - len(all_results)) // RESULTS_PER_QUERY)
+                futures = [ex.submit(run_query, region, query) for query in remaining[:wave]]
+                remaining = remaining[wave:]
+                wave_start = len(all_results)
+                for future in futures:
+                    for r in future.result():
+                        url = r.get('link', '')
+                        if url and url not in seen_urls:
+                            seen_urls.add(url)
+                            if not is_news_url(url):
+                                filtered_count += 1
+                            elif predates_cutoff(r.get('date'), today):
+                                old_count += 1
+                            else:
+                                r['_search_region'] = region
+                                all_results.append(r)
+                
+                if known_url_lookup is not None:
+                    wave_urls = [r['link'] for r in all_results[wave_start:]]
+                    if wave_urls:
+                        new_count += len(wave_urls) - len(known_url_lookup(wave_urls))
             
-            if len(all_results) >= 25:
+            if satisfied():
                 break
-        
-        if len(all_results) >= 25:
-            break
     
     if filtered_count > 0:
         print(f" ({filtered_count} non-news URLs filtered)", end="")
+    if old_count > 0:
+        print(f" ({old_count} pre-{NEWS_CUTOFF.year} results dropped)", end="")
     
-    return all_results[:25]
+    return all_results[:MAX_ARTICLES]
 
 
-def analyze_with_claude(competitor_name, articles):
-    """Send articles to Claude for analysis, batching if needed"""
-    if not articles:
-        return None
-    
-    if not ANTHROPIC_API_KEY:
-        print("      ERROR: ANTHROPIC_API_KEY not set in .env")
-        return None
-    
-    # Batch articles to avoid overwhelming Claude (max 12 per batch)
-    BATCH_SIZE = 12
-    all_news_items = []
+# Articles per Claude request (keeps each response well inside max_tokens)
+CLAUDE_BATCH_SIZE = 12
+
+
+def _analyze_batch_with_claude(competitor_name, batch, batch_num, total_batches):
+    """Analyze one batch of articles. Returns its news items, or None if the call failed."""
+    label = f"      [batch {batch_num}/{total_batches}]" if total_batches > 1 else "     "
     
-    for batch_start in range(0, len(articles), BATCH_SIZE):
-        batch = articles[batch_start:batch_start + BATCH_SIZE]
-        batch_num = (batch_start // BATCH_SIZE) + 1
-        total_batches = (len(articles) + BATCH_SIZE - 1) // BATCH_SIZE
-        
-        if total_batches > 1:
-            print(f"      [batch {batch_num}/{total_batches}]", end="")
+    parts = []
+    for i, article in enumerate(batch, 1):
+        title = sanitize_text(article.get('title', 'No title'))
+        snippet = sanitize_text(article.get('snippet', article.get('description', '')))[:500]
+        url = article.get('link', article.get('url', ''))
+        date = article.get('date', 'Unknown')
+        region = article.get('_search_region', 'global').upper()
         
-        articles_text = ""
-        for i, article in enumerate(batch, 1):
-            title = sanitize_text(article.get('title', 'No title'))
-            snippet = sanitize_text(article.get('snippet', article.get('description', '')))
-            url = article.get('link', article.get('url', ''))
-            date = article.get('date', 'Unknown')
-            region = article.get('_search_region', 'global').upper()
-            
-            articles_text += f"""
+        parts.append(f"""
 ---
 Article {i}:
 Title: {title}
 Published Date: {date}
 URL: {url}
 Region Found: {region}
-Content: {snippet[:500]}
+Content: {snippet}
 ---
-"""
-        
-        prompt = ANALYSIS_PROMPT.format(
-            competitor_name=competitor_name,
-            articles=articles_text
-        )
-        
-        try:
-            message = client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=4000,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            
-            response_text = message.content[0].text.strip()
-            
-            # Clean JSON if wrapped in markdown
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0]
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0]
-            
-            response_text = response_text.strip()
-            
-            # Try to fix truncated JSON
-            result = None
-            try:
-                result = json.loads(response_text)
-            except json.JSONDecodeError:
-                # Attempt recovery: try adding closing brackets
-                for fix in ['}]}', ']}', '}']:
-                    try:
-                        result = json.loads(response_text + fix)
-                        print(" (recovered truncated JSON)", end="")
-                        break
-                    except json.JSONDecodeError:
-                        continue
-            
-            if result is None:
-                print(f" JSON parse failed, skipping batch")
-                continue
-            
-            if not result.get('no_relevant_news'):
-                batch_items = result.get('news_items', [])
-                all_news_items.extend(batch_items)
-                if total_batches > 1:
-                    print(f" → {len(batch_items)} items")
-            else:
-                if total_batches > 1:
-                    print(f" → no relevant news")
-                
-        except anthropic.APIError as e:
-            print(f"\n      Claude API error: {e}")
-            continue
-        except Exception as e:
-            print(f"\n      Error: {e}")
-            continue
-        
-        # Small delay between batches
-        if batch_start + BATCH_SIZE < len(articles):
-            time.sleep(0.5)
+""")
+    
+    prompt = ARTICLES_PROMPT.format(
+        competitor_name=competitor_name,
+        articles="".join(parts)
+    )
+    
+    try:
+        # Streamed, so the read timeout applies between tokens rather than to the whole
+        # generation; the tool input is only complete at the end, so we take the final message
+        with CLAUDE_SEM, client.messages.stream(
+            model=CLAUDE_MODEL,
+            max_tokens=4000,
+            system=[{"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}],
+            tools=[NEWS_TOOL],
+            tool_choice={"type": "tool", "name": "record_news"},
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        ) as stream:
+            message = stream.get_final_message()
+    except anthropic.APIError as e:
+        print(f"\n{label} Claude API error: {e}")
+        return None
+    except Exception as e:
+        print(f"\n{label} Error: {e}")
+        return None
+    
+    tool_input = next((block.input for block in message.content if block.type == "tool_use"), None)
+    if not isinstance(tool_input, dict):
+        print(f"{label} No tool output (stop: {message.stop_reason}), skipping batch")
+        return None
+    
+    batch_items = tool_input.get('news_items') or []
+    if total_batches > 1:
+        print(f"{label} → {len(batch_items)} items" if batch_items else f"{label} → no relevant news")
+    return batch_items
+
+
+def analyze_with_claude(competitor_name, articles):
+    """Send articles to Claude for analysis, batching if needed.
+    A competitor's batches are sent concurrently; CLAUDE_SEM bounds calls across all workers.
+    """
+    if not articles:
+        return None
+    
+    if not ANTHROPIC_API_KEY:
+        print("      ERROR: ANTHROPIC_API_KEY not set in .env")
+        return None
+    
+    batches = [articles[i:i + CLAUDE_BATCH_SIZE] for i in range(0, len(articles), CLAUDE_BATCH_SIZE)]
+    total_batches = len(batches)
+    
+    if total_batches == 1:
+        results = [_analyze_batch_with_claude(competitor_name, batches[0], 1, 1)]
+    else:
+        with ThreadPoolExecutor(max_workers=total_batches) as ex:
+            results = list(ex.map(
+                lambda nb: _analyze_batch_with_claude(competitor_name, nb[1], nb[0], total_batches),
+                enumerate(batches, 1),
+            ))
+    
+    # Batch order is kept, so items come back in article order
+    all_news_items = [item for items in results if items for item in items]
     
     if not all_news_items:
         return {'no_relevant_news': True}
@@ -526,22 +776,34 @@ def fetch_news_for_competitor(competitor, regions=['global', 'brazil_pt', 'brazi
     
     print(f"\n  🔍 {name}", end="")
     
-    articles = search_news(name, regions, date_restrict=date_restrict)
+    # Stored URLs are looked up wave by wave as the search runs, so it can stop once
+    # enough new articles are in hand; the same lookups drive the pre-filter below
+    known_urls = set()
+    
+    def lookup(urls):
+        with db_connection() as conn:
+            found = fetch_existing_urls(conn.cursor(), urls)
+        if existing_urls:
+            found.update(u for u in urls if u in existing_urls)
+        known_urls.update(found)
+        return found
+    
+    articles = search_news(name, regions, date_restrict=date_restrict,
+                           known_url_lookup=lookup, target_new=NEW_ARTICLES_TARGET)
     
     if not articles:
         print(f" — no articles found")
         return 0
     
-    # Pre-filter: remove articles whose URLs are already in the DB
-    if existing_urls:
-        new_articles = [a for a in articles if a.get('link', '') not in existing_urls]
-        skipped = len(articles) - len(new_articles)
-        if skipped > 0:
-            print(f" — {len(articles)} found, {skipped} already known", end="")
-        if not new_articles:
-            print(f" — all duplicates, skipping Claude")
-            return 0
-        articles = new_articles
+    # Pre-filter: remove articles whose URLs are already stored or saved earlier in this run
+    new_articles = [a for a in articles if a['link'] not in known_urls]
+    skipped = len(articles) - len(new_articles)
+    if skipped > 0:
+        print(f" — {len(articles)} found, {skipped} already known", end="")
+    if not new_articles:
+        print(f" — all duplicates, skipping Claude")
+        return 0
+    articles = new_articles
     
     print(f" — analyzing {len(articles)} new articles...")
     
@@ -558,8 +820,10 @@ def fetch_news_for_competitor(competitor, regions=['global', 'brazil_pt', 'brazi
     news_items = analysis.get('news_items', [])
     saved = 0
     
-    for item in news_items:
-        success, status = save_news_item(comp_id, item)
+    with db_connection() as conn:
+        results = save_news_items(conn, comp_id, news_items, existing_urls)
+    
+    for item, (success, status) in zip(news_items, results):
         if success:
             saved += 1
             region = item.get('region', 'GLOBAL')
@@ -574,9 +838,6 @@ def fetch_news_for_competitor(competitor, regions=['global', 'brazil_pt', 'brazi
 
 def write_status(status, current_competitor=None, processed=0, total=0, error=None):
     """Write progress status to JSON file for Next.js API to read"""
-    import time
-    from datetime import datetime, timezone
-
     # Calculate progress
     percent_complete = 0
     if total > 0:
@@ -592,31 +853,41 @@ def write_status(status, current_competitor=None, processed=0, total=0, error=No
         'total': total,
         'percent_complete': percent_complete,
         'estimated_seconds_remaining': estimated_seconds_remaining,
-        'started_at': datetime.now(timezone.utc).isoformat() if status == 'running' and processed == 0 else None,
-        'completed_at': datetime.now(timezone.utc).isoformat() if status == 'completed' else None,
+        'started_at': datetime.datetime.now(datetime.timezone.utc).isoformat() if status == 'running' and processed == 0 else None,
+        'completed_at': datetime.datetime.now(datetime.timezone.utc).isoformat() if status == 'completed' else None,
         'error': error
     }
 
-    # Write to public directory
-    status_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'public', 'refresh_status.json')
-    os.makedirs(os.path.dirname(status_path), exist_ok=True)
-
-    with open(status_path, 'w') as f:
-        json.dump(status_data, f, indent=2)
-        f.flush()  # Ensure immediate write
+    # Workers report concurrently: serialize writers, skip repeats and swap the file in atomically
+    global _last_status_bytes, _last_status_write
+    payload = orjson.dumps(status_data)
+    with _status_lock:
+        if payload == _last_status_bytes:
+            return status_data
+        now = time.monotonic()
+        if status == 'running' and processed not in (0, total) and now - _last_status_write < STATUS_MIN_INTERVAL:
+            return status_data
+        _last_status_write = now
+        if _last_status_bytes is None:
+            os.makedirs(os.path.dirname(STATUS_PATH), exist_ok=True)
+        tmp_path = STATUS_PATH + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, STATUS_PATH)
+        _last_status_bytes = payload
 
     return status_data
 
 
-def clear_all_news():
-    """Clear all news"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM "CompetitorNews"')
-    deleted = cursor.rowcount
-    conn.commit()
-    conn.close()
-    return deleted
+def clear_all_news(cursor=None):
+    """Clear all news (pass cursor to reuse a connection)"""
+    if cursor is None:
+        with db_connection() as conn:
+            return clear_all_news(conn.cursor())
+    # TRUNCATE is a metadata operation on Postgres, DELETE marks every tuple. No row
+    # count is taken first, as a COUNT(*) would scan the whole table anyway.
+    cursor.execute('TRUNCATE TABLE "CompetitorNews"')
+    cursor.connection.commit()
 
 
 def fetch_all_news(limit=None, clean_start=False, regions=['global', 'brazil_pt', 'brazil_en', 'europe'], days=None):
@@ -634,10 +905,6 @@ def fetch_all_news(limit=None, clean_start=False, regions=['global', 'brazil_pt'
         write_status('error', error='ANTHROPIC_API_KEY not found in .env')
         return 0
 
-    if clean_start:
-        deleted = clear_all_news()
-        print(f"\n🧹 Cleared {deleted} news entries")
-
     def _days_to_tbs(n):
         """Convert a number of days to a valid Serper tbs value (qdr:d/w/m/y)."""
         if n <= 1:   return 'd'
@@ -645,31 +912,42 @@ def fetch_all_news(limit=None, clean_start=False, regions=['global', 'brazil_pt'
         if n <= 30:  return 'm'
         return 'y'   # Serper max granularity is one year; >365 days → no restriction below
 
-    # Determine date restriction for Serper searches
-    date_restrict = None
-    if days:
-        date_restrict = _days_to_tbs(days)
-        print(f"\n📅 Searching last {days} day(s) (tbs=qdr:{date_restrict})")
-    elif not clean_start:
-        # Auto-detect: calculate days since last fetch
-        last_fetch = get_last_fetch_date()
-        if last_fetch:
-            if isinstance(last_fetch, str):
-                last_fetch = datetime.datetime.fromisoformat(last_fetch.replace('Z', '+00:00'))
-            days_since = (datetime.datetime.now(datetime.timezone.utc) - last_fetch).days
-            search_days = max(days_since + 1, 1)  # At least 1 day, +1 for overlap
-            search_days = min(search_days, 14)  # Cap at 2 weeks
-            date_restrict = _days_to_tbs(search_days)
-            print(f"\n📅 Last fetch: {last_fetch.strftime('%b %d, %Y')} — searching last {search_days} day(s)")
-        else:
-            print(f"\n📅 First run — searching all available articles")
+    # Setup queries share one connection
+    with db_connection() as conn:
+        cursor = conn.cursor()
+
+        if clean_start:
+            clear_all_news(cursor)
+            print("\n🧹 Cleared all news entries")
+
+        # Determine date restriction for Serper searches
+        date_restrict = None
+        if days:
+            date_restrict = _days_to_tbs(days)
+            print(f"\n📅 Searching last {days} day(s) (tbs=qdr:{date_restrict})")
+        elif not clean_start:
+            # Auto-detect: calculate days since last fetch
+            last_fetch = get_last_fetch_date(cursor)
+            if last_fetch:
+                if isinstance(last_fetch, str):
+                    last_fetch = datetime.datetime.fromisoformat(last_fetch.replace('Z', '+00:00'))
+                if last_fetch.tzinfo is None:
+                    # TIMESTAMP(3) columns come back naive; they hold UTC
+                    last_fetch = last_fetch.replace(tzinfo=datetime.timezone.utc)
+                days_since = (datetime.datetime.now(datetime.timezone.utc) - last_fetch).days
+                search_days = max(days_since + 1, 1)  # At least 1 day, +1 for overlap
+                search_days = min(search_days, 14)  # Cap at 2 weeks
+                date_restrict = _days_to_tbs(search_days)
+                print(f"\n📅 Last fetch: {last_fetch.strftime('%b %d, %Y')} — searching last {search_days} day(s)")
+            else:
+                print(f"\n📅 First run — searching all available articles")
+
+        competitors = get_competitors(cursor)
 
-    # Pre-load all existing URLs for fast duplicate checking
-    print("📦 Loading existing URLs from database...")
-    existing_urls = get_all_existing_urls()
-    print(f"   {len(existing_urls)} existing articles in DB")
+    # URLs saved during this run; stored ones are looked up per competitor and
+    # the unique "sourceUrl" index rejects anything that slips past both
+    existing_urls = set()
 
-    competitors = get_competitors()
     print(f"📋 Found {len(competitors)} competitors")
     print(f"🌍 Searching regions: {', '.join(regions)}")
 
@@ -683,21 +961,24 @@ def fetch_all_news(limit=None, clean_start=False, regions=['global', 'brazil_pt'
     # Write initial status
     write_status('running', current_competitor=None, processed=0, total=total_competitors)
 
-    try:
-        for i, comp in enumerate(competitors, 1):
-            # Update status before processing each competitor
-            write_status('running', current_competitor=comp['name'], processed=i-1, total=total_competitors)
+    processed = 0
 
-            print(f"[{i}/{len(competitors)}]", end="")
-            saved = fetch_news_for_competitor(comp, regions, existing_urls=existing_urls, date_restrict=date_restrict)
-            total_news += saved
+    def process(i, comp):
+        # Update status before processing each competitor
+        write_status('running', current_competitor=comp['name'], processed=processed, total=total_competitors)
+        print(f"[{i}/{total_competitors}]", end="")
+        return fetch_news_for_competitor(comp, regions, existing_urls=existing_urls, date_restrict=date_restrict)
 
-            # Update status after processing
-            write_status('running', current_competitor=comp['name'], processed=i, total=total_competitors)
+    # Serper and Claude are paced by their own limiters, so no sleep between competitors
+    executor = ThreadPoolExecutor(max_workers=COMPETITOR_WORKERS)
+    try:
+        futures = {executor.submit(process, i, comp): comp for i, comp in enumerate(competitors, 1)}
+        for future in as_completed(futures):
+            total_news += future.result()
+            processed += 1
 
-            # Rate limiting - Serper is fast but let's be nice
-            if i < len(competitors):
-                time.sleep(1)
+            # Update status after processing
+            write_status('running', current_competitor=futures[future]['name'], processed=processed, total=total_competitors)
 
         # Write completion status
         write_status('completed', processed=total_competitors, total=total_competitors)
@@ -710,8 +991,11 @@ def fetch_all_news(limit=None, clean_start=False, regions=['global', 'brazil_pt'
 
     except Exception as e:
         print(f"\n\n❌ ERROR: {e}")
-        write_status('error', error=str(e), processed=i-1, total=total_competitors)
+        write_status('error', error=str(e), processed=processed, total=total_competitors)
         raise
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        close_db_pool()
 
 
 if __name__ == "__main__":